@@ -13,10 +13,11 @@ from langchain_core.prompts.chat import (
     HumanMessagePromptTemplate,
     MessagesPlaceholder
 )
-from langchain_openai import ChatOpenAI
 from langchain_core.chat_history import BaseChatMessageHistory
 from langchain_core.runnables.history import RunnableWithMessageHistory
 from langchain_community.chat_message_histories import ChatMessageHistory
+from llm.gateway import LLM_PROVIDER, get_chat_model
+from doc_loader.catalog import DATA_DIR
 
 from dotenv import load_dotenv
 
@@ -25,14 +26,14 @@ from dotenv import load_dotenv
 load_dotenv()
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 
-if not OPENAI_API_KEY:
+# The offline fake model (LLM_PROVIDER=fake) needs no key
+if not OPENAI_API_KEY and LLM_PROVIDER != "fake":
     print("Error: OPENAI_API_KEY not found in environment variables")
     sys.exit(1)
 
 # Get week tag and load JSON
 week_tag = "2025-W36"  
-project_root = Path(__file__).resolve().parent.parent.parent
-data_file = project_root / "data" / f"week-{week_tag}.json"
+data_file = DATA_DIR / f"week-{week_tag}.json"
 
 try:
     with open(data_file, "r", encoding="utf-8") as f:
@@ -84,7 +85,7 @@ prompt = ChatPromptTemplate.from_messages([
 ])
 
 # Initialize the LLM
-llm = ChatOpenAI(model="gpt-4o-mini", api_key=OPENAI_API_KEY)
+llm = get_chat_model()
 
 # Create the base chain
 chain = prompt | llm
@@ -0,0 +1,253 @@
+"""
+Data catalog manifest shared by the web app, the news loader and the Notion uploader.
+
+The pipeline records every data file it writes in data/manifest.json
+(week -> file, article count, content hash, mtime, date range), so readers
+can list weeks with one small read instead of globbing data/ and parsing
+every JSON file. The manifest is generated, not committed: the pipeline
+(update_manifest) and init_vector_store.py write it. load_manifest() never
+writes, so the web app only needs read access to data/; without a manifest
+it describes the data files in memory.
+
+Usage:
+    python3 catalog.py rebuild   - Rebuild the manifest from data/
+    python3 catalog.py show      - Print the manifest's week listing
+"""
+import os
+import sys
+import json
+import fcntl
+import hashlib
+import tempfile
+from pathlib import Path
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# NEWS_DATA_DIR points the web app at another dataset (e.g. a synthetic one for load tests)
+DATA_DIR = Path(os.environ.get("NEWS_DATA_DIR") or Path(__file__).resolve().parent.parent.parent / "data").resolve()
+MANIFEST_FILE = DATA_DIR / "manifest.json"
+GENERAL_FILE = "mit_ai_news.json"
+MANIFEST_VERSION = 1
+# Bumped whenever new articles reach the data files and the vector store, so readers know to refresh
+GENERATION_FILE = DATA_DIR / ".index_generation"
+
+_cache = {}
+
+def _parse_date(date_string):
+    """Parse an RSS (RFC 822) or ISO date to an aware UTC datetime, or None."""
+    if not date_string:
+        return None
+    try:
+        parsed = parsedate_to_datetime(date_string)
+    except (TypeError, ValueError):
+        try:
+            parsed = datetime.fromisoformat(date_string.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+def _week_for_file(file_name):
+    if file_name == GENERAL_FILE:
+        return "all"
+    if file_name.startswith("week-") and file_name.endswith(".json"):
+        return file_name[len("week-"):-len(".json")]
+    return None
+
+def describe_file(path):
+    """Build the manifest entry for one data file."""
+    path = Path(path)
+    with open(path, "rb") as f:
+        raw = f.read()
+    st = os.stat(path)
+    data = json.loads(raw)
+    articles = data if isinstance(data, list) else data.get("articles", [])
+
+    dates = [d for d in (_parse_date(a.get("date", "")) for a in articles) if d]
+    entry = {
+        "week": _week_for_file(path.name),
+        "file": path.name,
+        "article_count": len(articles),
+        "content_hash": hashlib.sha256(raw).hexdigest(),
+        "mtime": st.st_mtime,
+        "size": st.st_size,
+        "date_range": [min(dates).isoformat(), max(dates).isoformat()] if dates else None,
+    }
+    if isinstance(data, dict):
+        entry["start_of_week"] = data.get("start_of_week")
+        entry["end_of_week"] = data.get("end_of_week")
+    if path.name == GENERAL_FILE:
+        # Per-week counts of the raw feed dump, used by `news_loader.py list`
+        week_counts = {}
+        for article in articles:
+            if article.get("week"):
+                week_counts[article["week"]] = week_counts.get(article["week"], 0) + 1
+        entry["week_counts"] = week_counts
+    return entry
+
+def _write_manifest(manifest):
+    """Write the manifest atomically so readers never see a partial file."""
+    manifest["generated_at"] = datetime.now().isoformat()
+    fd, tmp_path = tempfile.mkstemp(dir=DATA_DIR, prefix=".manifest-", suffix=".json")
+    try:
+        # mkstemp creates the file owner-only; the web app may run as another user
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, MANIFEST_FILE)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+class _ManifestLock:
+    """Serialize manifest writers across processes."""
+
+    def __enter__(self):
+        DATA_DIR.mkdir(parents=True, exist_ok=True)
+        self._file = open(DATA_DIR / ".manifest.lock", "w")
+        fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+
+def _scan_data_files():
+    files = []
+    if (DATA_DIR / GENERAL_FILE).exists():
+        files.append(DATA_DIR / GENERAL_FILE)
+    files.extend(sorted(DATA_DIR.glob("week-*.json")))
+    return files
+
+def build_manifest():
+    """Describe every data file in data/, without writing anything."""
+    manifest = {"version": MANIFEST_VERSION, "weeks": {}}
+    for path in _scan_data_files():
+        try:
+            entry = describe_file(path)
+        except Exception as e:
+            print(f"❌ Error reading {path.name}: {e}")
+            continue
+        manifest["weeks"][entry["week"]] = entry
+    return manifest
+
+def rebuild_manifest():
+    """Rebuild the manifest file from every data file in data/."""
+    with _ManifestLock():
+        manifest = build_manifest()
+        _write_manifest(manifest)
+    return manifest
+
+def update_manifest(*paths):
+    """Refresh the manifest entries of the given data files (call after writing them)."""
+    with _ManifestLock():
+        manifest = _read_manifest()
+        if manifest is None:
+            manifest = {"version": MANIFEST_VERSION, "weeks": {}}
+            paths = _scan_data_files()
+        for path in paths:
+            # Writers may pass paths relative to their own cwd; the file always lives in data/
+            path = DATA_DIR / Path(path).name
+            week = _week_for_file(path.name)
+            if week is None:
+                continue
+            if path.exists():
+                manifest["weeks"][week] = describe_file(path)
+            else:
+                manifest["weeks"].pop(week, None)
+        _write_manifest(manifest)
+    return manifest
+
+def _read_manifest():
+    try:
+        with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+def load_manifest():
+    """Return the manifest; cached until the file changes (or forget_manifest()).
+
+    Read-only: if the file is missing or outdated, the data files are described in memory.
+    """
+    try:
+        st = os.stat(MANIFEST_FILE)
+        signature = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        signature = None
+
+    cached = _cache.get("manifest")
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    manifest = _read_manifest() if signature else None
+    if manifest is None:
+        manifest = build_manifest()
+    _cache["manifest"] = (signature, manifest)
+    return manifest
+
+def list_weeks():
+    """Return weekly file entries (excluding the general news file), newest week first."""
+    weeks = load_manifest()["weeks"]
+    return sorted(
+        (entry for week, entry in weeks.items() if week != "all"),
+        key=lambda entry: entry["week"],
+        reverse=True,
+    )
+
+def forget_manifest():
+    """Drop the cached manifest so the next load_manifest() re-reads it."""
+    _cache.pop("manifest", None)
+
+def get_entry(week):
+    """Return the manifest entry for a week tag (or "all"), or None."""
+    return load_manifest()["weeks"].get(week)
+
+# ----------------------
+# Index generation
+# ----------------------
+def read_generation():
+    """Current index generation (0 if it has never been bumped)."""
+    try:
+        with open(GENERATION_FILE, "r", encoding="utf-8") as f:
+            return int(json.load(f).get("generation", 0))
+    except (FileNotFoundError, json.JSONDecodeError, ValueError):
+        return 0
+
+def bump_generation(reason=""):
+    """Increment the index generation; call after new documents land in the data files and vector store."""
+    with _ManifestLock():
+        generation = read_generation() + 1
+        fd, tmp_path = tempfile.mkstemp(dir=DATA_DIR, prefix=".generation-", suffix=".json")
+        try:
+            os.fchmod(fd, 0o644)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"generation": generation, "updated_at": datetime.now().isoformat(), "reason": reason}, f)
+            os.replace(tmp_path, GENERATION_FILE)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+    return generation
+
+def main():
+    command = sys.argv[1].lower() if len(sys.argv) > 1 else ""
+    if command == "rebuild":
+        manifest = rebuild_manifest()
+        print(f"✅ Manifest rebuilt with {len(manifest['weeks'])} entries: {MANIFEST_FILE}")
+    elif command == "show":
+        general = get_entry("all")
+        if general:
+            print(f"all: {general['article_count']} articles ({general['file']})")
+        for entry in list_weeks():
+            print(f"{entry['week']}: {entry['article_count']} articles ({entry['file']})")
+    else:
+        print("Usage:")
+        print("  python3 catalog.py rebuild   - Rebuild the manifest from data/")
+        print("  python3 catalog.py show      - Print the manifest's week listing")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Checkpoints that make the ingest pipeline cheap to rerun.
+
+SummaryCache keeps every generated article summary in SQLite, keyed by a
+hash of the model, the prompt and the article text, and commits each one as
+soon as it is generated. A run that crashes halfway through summarizing
+picks up after the last completed article, and unchanged articles are
+never sent to the LLM again.
+
+StageRunner records, per stage, a hash of the stage's inputs when it last
+completed (data/.pipeline_state.json). A stage whose inputs hash to the
+same value is skipped; `--force` reruns everything.
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import tempfile
+import threading
+
+# Add the agents directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from doc_loader.catalog import DATA_DIR
+from doc_loader.tracing import span
+
+PIPELINE_STATE_FILE = os.environ.get("PIPELINE_STATE_FILE") or str(DATA_DIR / ".pipeline_state.json")
+SUMMARY_CACHE_FILE = os.environ.get("SUMMARY_CACHE_FILE") or str(DATA_DIR / ".summary_cache.sqlite3")
+
+def hash_values(*values):
+    """Stable hash of JSON-serializable values."""
+    raw = json.dumps(values, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def hash_file(path):
+    """Content hash of a file, or "missing"."""
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return "missing"
+
+# ----------------------
+# Per-article summaries
+# ----------------------
+class SummaryCache:
+    """Generated summaries by input hash, shared by every pipeline process."""
+
+    def __init__(self, path=SUMMARY_CACHE_FILE):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS summaries (key TEXT PRIMARY KEY, summary TEXT, created REAL)"
+        )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def key(model, prompt, text):
+        return hash_values(model, prompt, text)
+
+    def get(self, key):
+        row = self._connect().execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key, summary):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO summaries (key, summary, created) VALUES (?, ?, ?)",
+            (key, summary, time.time()),
+        )
+
+# ----------------------
+# Stage skipping
+# ----------------------
+class StageRunner:
+    """Run pipeline stages, skipping those whose inputs are unchanged since they last completed."""
+
+    def __init__(self, path=PIPELINE_STATE_FILE, force=False):
+        self.path = path
+        self.force = force
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.state = {}
+
+    def run(self, name, key_fn, func, *args, scope=None):
+        """Run func(*args) as stage `name` unless key_fn() matches its last completed run.
+
+        `scope` (e.g. a week tag) keeps separate checkpoints per instance of a
+        stage. key_fn is evaluated before and after the stage and both hashes
+        are recorded, so a stage that rewrites its own input (e.g. tagging the
+        feed file in place) is still skipped next time. A stage counts as
+        completed unless func raises or returns False.
+        """
+        state_key = f"{name}:{scope}" if scope else name
+        key = key_fn()
+        entry = self.state.get(state_key, {})
+        if not self.force and key in (entry.get("input_hash"), entry.get("output_hash")):
+            print(f"⏭️  {state_key}: inputs unchanged since {entry.get('completed_at', 'last run')}, skipping")
+            with span(name, scope=scope, skipped=True):
+                return None
+
+        with span(name, scope=scope, skipped=False):
+            result = func(*args)
+        if result is False:
+            print(f"⚠️  {state_key}: did not complete; it will run again next time")
+            return result
+
+        self.state[state_key] = {
+            "input_hash": key,
+            "output_hash": key_fn(),
+            "completed_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        self._save()
+        return result
+
+    def _save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.state, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
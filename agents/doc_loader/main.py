@@ -1,10 +1,15 @@
 import os
+import sys
 import json
 from dotenv import load_dotenv
-from langchain_community.chat_models import ChatOpenAI
-from langchain_core.output_parsers import StrOutputParser
-from news_loader import *
-from notion_loader import *
+
+# Import sibling modules through the doc_loader package, like streaming.py does, so each is loaded once
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from doc_loader.news_loader import *
+from doc_loader.notion_loader import *
+from doc_loader.tracing import traced_run, span, compare_runs
+from doc_loader.checkpoints import StageRunner, hash_file, hash_values
+from doc_loader.catalog import bump_generation
 from pathlib import Path
 
 load_dotenv()
@@ -12,63 +17,96 @@ OPEN_AI_KEY = os.environ.get("OPENAI_API_KEY")
 NOTION_TOKEN = os.environ.get("NOTION_TOKEN")
 DATABASE_ID = os.environ.get("DATABASE_ID")
 
-llm = ChatOpenAI(model="gpt-4o-mini", api_key=OPEN_AI_KEY)
-output_parser = StrOutputParser()
-rss_url = "https://news.mit.edu/topic/mitartificial-intelligence2-rss.xml"
+NEWS_FILE = "../../data/mit_ai_news.json"
 
-def main():
-    """Main function to run the news processing pipeline"""
-    try:
-        # Get current week tag
-        current_week = get_week_tag()
-        print(f"🕐 Current week: {current_week}")
-        print("=" * 50)
-        
-        # Step 1: Fetch and process news
-        print("📰 Step 1: Fetching MIT AI news...")
+def weekly_file(week_tag):
+    return f"../../data/week-{week_tag}.json"
+
+def process_news(current_week, runner):
+    """Steps 1-3: fetch new articles, tag them with weeks and write the weekly JSON with summaries"""
+    # Step 1: Fetch and process news (the feed is external, so this always runs)
+    print("📰 Step 1: Fetching MIT AI news...")
+    with span("fetch"):
         news_data = fetch_mit_news(max_articles=5)
 
-        if news_data.get("news_text") and news_data.get("title"):
-            print(f"✅ Processing article: {news_data['title']}")
+    if news_data.get("news_text") and news_data.get("title"):
+        print(f"✅ Processing article: {news_data['title']}")
+        with span("latest_summary"):
             summary_data = summarize_news(news_data["title"], news_data["news_text"], news_data["link"], news_data["date"], save_to_file=False)
-            print("✅ Summary generated successfully")
-        else:
-            print("⚠️  No valid news data to process")
-
-        # Step 2: Tag articles with week information
-        print("\n🏷️  Step 2: Tagging articles with week information...")
-        tag_weekly_articles()
-        print("✅ Weekly tagging completed")
-
-        # Step 3: Generate weekly JSON with summaries
-        print(f"\n📅 Step 3: Generating weekly summary for {current_week}...")
-        save_weekly_articles_with_summary(current_week)
-        print("✅ Weekly JSON with summaries completed")
-
-        # Step 4: Upload to Notion if credentials are available
-        if NOTION_TOKEN and DATABASE_ID:
-            print(f"\n📤 Step 4: Uploading {current_week} articles to Notion...")
-            upload_current_week_to_notion(current_week)
-        else:
-            print("❌ Notion credentials not found, skipping Notion integration")
+        print("✅ Summary generated successfully")
+    else:
+        print("⚠️  No valid news data to process")
+
+    # Step 2: Tag articles with week information
+    print("\n🏷️  Step 2: Tagging articles with week information...")
+    runner.run("tag", lambda: hash_file(NEWS_FILE), tag_weekly_articles)
+    print("✅ Weekly tagging completed")
+
+    # Step 3: Generate weekly JSON with summaries
+    print(f"\n📅 Step 3: Generating weekly summary for {current_week}...")
+    summarize_week(current_week, runner)
+    print("✅ Weekly JSON with summaries completed")
+
+def summarize_week(week_tag, runner):
+    """Write the week's JSON with summaries, unless its articles and the weekly file are unchanged"""
+    def inputs():
+        return hash_values(get_articles_for_week(week_tag), llm.model_name, SUMMARY_PROMPT, hash_file(weekly_file(week_tag)))
+
+    # Failed summaries leave the stage incomplete, so they are retried next run (finished ones are cached)
+    result = runner.run("weekly_summaries", inputs, lambda: not save_weekly_articles_with_summary(week_tag), scope=week_tag)
+    if result is not None:
+        # The weekly file was rewritten; running web workers refresh their week list and payloads
+        bump_generation(f"weekly summaries for {week_tag}")
+
+def main(force=False):
+    """Main function to run the news processing pipeline"""
+    try:
+        with traced_run("auto"):
+            runner = StageRunner(force=force)
+            # Get current week tag
+            current_week = get_week_tag()
+            print(f"🕐 Current week: {current_week}")
+            print("=" * 50)
+
+            process_news(current_week, runner)
+
+            # Step 4: Upload to Notion if credentials are available
+            if NOTION_TOKEN and DATABASE_ID:
+                print(f"\n📤 Step 4: Uploading {current_week} articles to Notion...")
+                upload_current_week_to_notion(current_week, runner)
+            else:
+                print("❌ Notion credentials not found, skipping Notion integration")
 
-        print(f"\n🎉 Pipeline completed successfully for week {current_week}!")
+            print(f"\n🎉 Pipeline completed successfully for week {current_week}!")
 
     except Exception as e:
         print(f"❌ Error in main function: {e}")
         import traceback
         traceback.print_exc()
 
-def upload_current_week_to_notion(week_tag):
-    """Upload current week's articles to Notion using the enhanced notion loader"""
+def upload_current_week_to_notion(week_tag, runner=None):
+    """Upload current week's articles to Notion using the enhanced notion loader
+
+    Skipped when the weekly file hasn't changed since its last complete upload.
+    """
+    runner = runner or StageRunner()
+    runner.run(
+        "notion_upload",
+        lambda: hash_values(hash_file(weekly_file(week_tag)), DATABASE_ID),
+        _upload_week_to_notion, week_tag,
+        scope=week_tag,
+    )
+
+def _upload_week_to_notion(week_tag):
+    """Returns False if the upload did not complete."""
     try:
         # Check if the weekly file exists
-        data_file = f"../../data/week-{week_tag}.json"
+        data_file = weekly_file(week_tag)
         
         if not os.path.exists(data_file):
             print(f"❌ Weekly data file not found: {data_file}")
             print("💡 Make sure to run the news processing steps first")
-            return
+            return False
         
         # Load the weekly data
         with open(data_file, "r", encoding="utf-8") as f:
@@ -84,7 +122,7 @@ def upload_current_week_to_notion(week_tag):
         # Check Notion connection first
         if not check_notion_connection():
             print("❌ Failed to connect to Notion")
-            return
+            return False
         
         # Get existing articles from Notion to check for duplicates
         print("🔍 Checking for existing articles in Notion database...")
@@ -109,51 +147,38 @@ def upload_current_week_to_notion(week_tag):
         
         # Upload new articles to Notion
         print(f"🚀 Uploading {new_count} new articles to Notion...")
-        upload_articles_to_notion(articles, existing_articles)
+        failed = upload_articles_to_notion(articles, existing_articles)
         
         print(f"✅ Notion upload completed for week {week_tag}")
+        return not failed
         
     except Exception as e:
         print(f"❌ Error uploading to Notion: {e}")
         import traceback
         traceback.print_exc()
+        return False
 
 if __name__ == "__main__":
-    import sys
-    
+    # --force reruns stages even when their inputs are unchanged
+    force = "--force" in sys.argv
+    if force:
+        sys.argv.remove("--force")
+
     # Handle command line arguments
     if len(sys.argv) > 1:
         command = sys.argv[1].lower()
         
         if command == "auto":
             # Run the full automated pipeline
-            main()
+            main(force)
         elif command == "news":
             # Only run news processing (steps 1-3)
             print("🕐 Running news processing only...")
             current_week = get_week_tag()
             print(f"Current week: {current_week}")
-            
-            # Step 1: Fetch and process news
-            print("📰 Step 1: Fetching MIT AI news...")
-            news_data = fetch_mit_news(max_articles=5)
-            
-            if news_data.get("news_text") and news_data.get("title"):
-                print(f"✅ Processing article: {news_data['title']}")
-                summary_data = summarize_news(news_data["title"], news_data["news_text"], news_data["link"], news_data["date"], save_to_file=False)
-                print("✅ Summary generated successfully")
-            else:
-                print("⚠️  No valid news data to process")
-            
-            # Step 2: Tag articles with week information
-            print("\n🏷️  Step 2: Tagging articles with week information...")
-            tag_weekly_articles()
-            print("✅ Weekly tagging completed")
-            
-            # Step 3: Generate weekly JSON with summaries
-            print(f"\n📅 Step 3: Generating weekly summary for {current_week}...")
-            save_weekly_articles_with_summary(current_week)
-            print("✅ Weekly JSON with summaries completed")
+
+            with traced_run("news"):
+                process_news(current_week, StageRunner(force=force))
             
         elif command == "notion":
             # Only run Notion upload (step 4)
@@ -163,7 +188,8 @@ if __name__ == "__main__":
             
             current_week = get_week_tag()
             print(f"📤 Uploading {current_week} articles to Notion...")
-            upload_current_week_to_notion(current_week)
+            with traced_run("notion"):
+                upload_current_week_to_notion(current_week, StageRunner(force=force))
             
         elif command == "week":
             # Process a specific week
@@ -176,25 +202,46 @@ if __name__ == "__main__":
             week_tag = sys.argv[2]
             print(f"🕐 Processing specific week: {week_tag}")
             
-            # Generate weekly summary for specified week
-            print(f"📅 Generating weekly summary for {week_tag}...")
-            save_weekly_articles_with_summary(week_tag)
-            print("✅ Weekly summary generated")
-            
-            # Upload to Notion if credentials available
-            if NOTION_TOKEN and DATABASE_ID:
-                print(f"📤 Uploading {week_tag} articles to Notion...")
-                upload_current_week_to_notion(week_tag)
-            else:
-                print("❌ Notion credentials not found, skipping upload")
-                
+            with traced_run("week"):
+                runner = StageRunner(force=force)
+                # Generate weekly summary for specified week
+                print(f"📅 Generating weekly summary for {week_tag}...")
+                summarize_week(week_tag, runner)
+                print("✅ Weekly summary generated")
+
+                # Upload to Notion if credentials available
+                if NOTION_TOKEN and DATABASE_ID:
+                    print(f"📤 Uploading {week_tag} articles to Notion...")
+                    upload_current_week_to_notion(week_tag, runner)
+                else:
+                    print("❌ Notion credentials not found, skipping upload")
+
+        elif command == "stream":
+            # Stream each new article through summarize -> index -> Notion as soon as it is fetched
+            from doc_loader.streaming import run_streaming
+            with traced_run("stream"):
+                run_streaming()
+
+        elif command == "watch":
+            # Poll the feed and stream new articles until stopped
+            from doc_loader.streaming import watch, WATCH_INTERVAL
+            watch(float(sys.argv[2]) if len(sys.argv) > 2 else WATCH_INTERVAL)
+
+        elif command == "runs":
+            # Compare stage timings of recent runs
+            compare_runs(int(sys.argv[2]) if len(sys.argv) > 2 else 5, command=sys.argv[3] if len(sys.argv) > 3 else None)
+
         else:
             print("Usage:")
             print("  python3 main.py auto          - Run full automated pipeline")
             print("  python3 main.py news          - Run news processing only (steps 1-3)")
             print("  python3 main.py notion        - Run Notion upload only (step 4)")
             print("  python3 main.py week <week>   - Process specific week (e.g., 2025-W35)")
+            print("  python3 main.py stream        - Summarize, index and upload each new article as it arrives")
+            print("  python3 main.py watch [secs]  - Keep polling the feed and streaming new articles")
+            print("  python3 main.py runs [N] [cmd] - Compare stage timings of the last N runs (optionally of one command)")
+            print("  Add --force to rerun stages whose inputs are unchanged")
             sys.exit(1)
     else:
         # Default: run full automated pipeline
-        main()
\ No newline at end of file
+        main(force)
\ No newline at end of file
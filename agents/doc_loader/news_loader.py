@@ -1,8 +1,8 @@
 from langchain_community.document_loaders import TextLoader
-from langchain_community.chat_models import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 import os
+import sys
 import json
 from dotenv import load_dotenv
 import feedparser
@@ -12,12 +12,29 @@ import hashlib
 import pytz
 from dateutil import parser as date_parser
 
+# Add the agents directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from llm.gateway import get_chat_model
+from doc_loader.catalog import get_entry, update_manifest
+from doc_loader.tracing import span
+from doc_loader.checkpoints import SummaryCache
+
 load_dotenv()
 OPEN_AI_KEY = os.environ.get("OPENAI_API_KEY")
 
-llm = ChatOpenAI(model="gpt-4o-mini", api_key=OPEN_AI_KEY)
+llm = get_chat_model(priority="batch")
 output_parser = StrOutputParser()
 rss_url = "https://news.mit.edu/topic/mitartificial-intelligence2-rss.xml"
+SUMMARY_PROMPT = "You are a helpful summarizer of current AI trend news. Make a single-sentence summary of the provided news."
+
+# Opened on first use, so importing this module (e.g. from the web app) creates no files
+_summary_cache = None
+
+def get_summary_cache():
+    global _summary_cache
+    if _summary_cache is None:
+        _summary_cache = SummaryCache()
+    return _summary_cache
 
 def get_article_id(entry):
     unique_string = entry.get("link", "") + entry.get("title", "")
@@ -137,6 +154,7 @@ def tag_weekly_articles():
         # Save updated articles
         with open(file_path, "w", encoding="utf-8") as f:
             json.dump(articles, f, ensure_ascii=False, indent=4)
+        update_manifest(file_path)
         
         print(f"Updated {updated_count} articles with week tags")
             
@@ -181,20 +199,14 @@ def process_specific_week(week_tag):
 
 def list_available_weeks():
     """List all weeks that have articles"""
-    file_path = "../../data/mit_ai_news.json"
-    if not os.path.exists(file_path):
-        print("No articles file found")
-        return []
-    
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            articles = json.load(f)
+        # Per-week counts are kept in the data manifest, so no need to parse the feed dump
+        general = get_entry("all")
+        if general is None:
+            print("No articles file found")
+            return []
         
-        week_counts = {}
-        for article in articles:
-            week = article.get("week")
-            if week:
-                week_counts[week] = week_counts.get(week, 0) + 1
+        week_counts = general.get("week_counts", {})
         
         print("Available weeks and article counts:")
         for week in sorted(week_counts.keys(), reverse=True):
@@ -254,11 +266,41 @@ def doc_loader(file_path):
         return {"news_text": ""}
 
 # ==================================================================== #
+def entry_to_article(entry):
+    """Turn an RSS feed entry into an article dict (plain-text content, week tag)"""
+    with span("parse", article=entry.get("title", "")):
+        # Extract content with fallback
+        if hasattr(entry, 'content') and entry.content:
+            content = entry.content[0].get("value", "")
+        elif hasattr(entry, 'summary'):
+            content = entry.summary
+        else:
+            content = entry.get("description", "")
+
+        text_content = BeautifulSoup(content, "html.parser").get_text().strip()
+
+        # Parse and validate date
+        date_string = entry.get("published", "") or entry.get("updated", "")
+        article_date = parse_article_date(date_string)
+        week_tag = get_week_tag(article_date) if article_date else get_week_tag()
+
+    return {
+        "id": get_article_id(entry),
+        "date": date_string,
+        "title": entry.get("title", ""),
+        "link": entry.get("link", ""),
+        "description": entry.get("description", ""),
+        "content": text_content,
+        "week": week_tag,
+        "processed_at": datetime.now().isoformat()
+    }
+
 def fetch_mit_news(max_articles=5):
     """Fetch and process MIT AI news from RSS feed, avoiding duplicates"""
     try:
         print("Fetching RSS feed...")
-        feed = feedparser.parse(rss_url)
+        with span("feed_fetch", url=rss_url):
+            feed = feedparser.parse(rss_url)
 
         if not feed.entries:
             return {"news_text": "No news articles found", "link": "", "title": "", "date": ""}
@@ -284,34 +326,9 @@ def fetch_mit_news(max_articles=5):
                 print(f"Skipping existing article: {entry.get('title', 'Unknown')}")
                 continue
 
-            # Extract content with fallback
-            if hasattr(entry, 'content') and entry.content:
-                content = entry.content[0].get("value", "")
-            elif hasattr(entry, 'summary'):
-                content = entry.summary
-            else:
-                content = entry.get("description", "")
-
-            text_content = BeautifulSoup(content, "html.parser").get_text().strip()
-            
-            # Parse and validate date
-            date_string = entry.get("published", "") or entry.get("updated", "")
-            article_date = parse_article_date(date_string)
-            week_tag = get_week_tag(article_date) if article_date else get_week_tag()
-
-            new_article = {
-                "id": article_id,
-                "date": date_string,
-                "title": entry.get("title", ""),
-                "link": entry.get("link", ""),
-                "description": entry.get("description", ""),
-                "content": text_content,
-                "week": week_tag,
-                "processed_at": datetime.now().isoformat()
-            }
-            
+            new_article = entry_to_article(entry)
             new_articles.append(new_article)
-            print(f"New article added: {entry.get('title', 'Unknown')} (Week: {week_tag})")
+            print(f"New article added: {entry.get('title', 'Unknown')} (Week: {new_article['week']})")
 
         # Merge old and new
         all_articles = existing_data + new_articles
@@ -320,6 +337,7 @@ def fetch_mit_news(max_articles=5):
         os.makedirs("../../data", exist_ok=True)
         with open(file_path, "w", encoding="utf-8") as f:
             json.dump(all_articles, f, ensure_ascii=False, indent=4)
+        update_manifest(file_path)
 
         print(f"Added {len(new_articles)} new articles")
 
@@ -358,12 +376,15 @@ def fetch_mit_news(max_articles=5):
 
 # ==================================================================== #
 def summarize_news(title, news_text, link, date, week_tag=None, save_to_file=True):
-    """Generate AI news summary using LangChain"""
+    """Generate AI news summary using LangChain
+
+    Summaries are cached by model, prompt and text, so an unchanged article is only summarized once.
+    """
     if not news_text.strip():
         return {"title": title, "summary": "No content available for summarization", "link": link, "date": date}
     
     prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are a helpful summarizer of current AI trend news. Make a single-sentence summary of the provided news."),
+        ("system", SUMMARY_PROMPT),
         ("human", "{news_text}"),
     ])
     
@@ -371,7 +392,13 @@ def summarize_news(title, news_text, link, date, week_tag=None, save_to_file=Tru
     chain = prompt | llm | output_parser
     
     try:
-        response = chain.invoke({"news_text": news_text})
+        cache_key = SummaryCache.key(llm.model_name, SUMMARY_PROMPT, news_text)
+        response = get_summary_cache().get(cache_key)
+        if response is None:
+            with span("llm_summarize", article=title, chars=len(news_text)):
+                response = chain.invoke({"news_text": news_text})
+            # Committed per article, so a crashed run resumes after the last summary it finished
+            get_summary_cache().put(cache_key, response)
         
         # Use provided week_tag or calculate from date
         if week_tag is None:
@@ -392,11 +419,14 @@ def summarize_news(title, news_text, link, date, week_tag=None, save_to_file=Tru
         if week_tag is None:
             article_date = parse_article_date(date)
             week_tag = get_week_tag(article_date) if article_date else get_week_tag()
-        return {"title": title, "summary": f"Error generating summary: {e}", "link": link, "date": date, "week": week_tag}
+        return {"title": title, "summary": f"Error generating summary: {e}", "link": link, "date": date, "week": week_tag, "error": str(e)}
 
 # ==================================================================== #
 def save_weekly_articles_with_summary(week_tag=None):
-    """Create a separate JSON for specified week's articles including AI summaries"""
+    """Create a separate JSON for specified week's articles including AI summaries
+
+    Returns the number of articles whose summary failed (None if the week has no articles).
+    """
     if week_tag is None:
         week_tag = get_week_tag()
     
@@ -410,6 +440,7 @@ def save_weekly_articles_with_summary(week_tag=None):
         return
 
     weekly_articles = []
+    failed = 0
     
     for article in weekly_articles_data:
         print(f"Generating summary for: {article.get('title', 'Unknown')}")
@@ -423,6 +454,8 @@ def save_weekly_articles_with_summary(week_tag=None):
             article.get("week"),  # Pass existing week tag
             save_to_file=False
         )
+        if summary_obj.get("error"):
+            failed += 1
 
         weekly_articles.append({
             "id": article.get("id"),
@@ -460,8 +493,12 @@ def save_weekly_articles_with_summary(week_tag=None):
     os.makedirs("../../data", exist_ok=True)
     with open(output_file, "w", encoding="utf-8") as f:
         json.dump(weekly_output, f, ensure_ascii=False, indent=4)
+    update_manifest(output_file)
 
     print(f"Weekly JSON with {len(weekly_articles)} articles and summaries saved to {output_file}")
+    if failed:
+        print(f"⚠️ {failed} summaries failed; they will be retried on the next run")
+    return failed
 
 # ==================================================================== #
 # ==================================================================== #
@@ -6,6 +6,11 @@ from dotenv import load_dotenv
 import sys
 from dateutil import parser as date_parser
 
+# Add the agents directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from doc_loader.catalog import DATA_DIR, list_weeks
+from doc_loader.tracing import span, mark_error
+
 load_dotenv()
 NOTION_TOKEN = os.environ.get("NOTION_TOKEN")
 DATABASE_ID = os.environ.get("DATABASE_ID")
@@ -51,7 +56,10 @@ def add_article_to_notion(article):
             }
         }
 
-        response = requests.post("https://api.notion.com/v1/pages", headers=headers, data=json.dumps(data))
+        with span("notion_request", article=article.get("title", ""), kind="create_page"):
+            response = requests.post("https://api.notion.com/v1/pages", headers=headers, data=json.dumps(data))
+            if response.status_code not in (200, 201):
+                mark_error(f"HTTP {response.status_code}")
 
         if response.status_code in (200, 201):
             print(f"✅ Added: {article.get('title', 'No Title')}")
@@ -95,10 +103,11 @@ def get_existing_articles_from_notion():
         url = f"https://api.notion.com/v1/databases/{DATABASE_ID}/query"
         
         # Query all pages in the database
-        response = requests.post(url, headers=headers, data=json.dumps({
-            "page_size": 100,
-            "sorts": [{"property": "Date", "direction": "descending"}]
-        }))
+        with span("notion_request", kind="query"):
+            response = requests.post(url, headers=headers, data=json.dumps({
+                "page_size": 100,
+                "sorts": [{"property": "Date", "direction": "descending"}]
+            }))
         
         if response.status_code != 200:
             print(f"❌ Failed to query Notion database: {response.status_code}")
@@ -125,10 +134,11 @@ def get_existing_articles_from_notion():
             
             # Check if there are more pages
             if data.get("has_more") and data.get("next_cursor"):
-                response = requests.post(url, headers=headers, data=json.dumps({
-                    "page_size": 100,
-                    "start_cursor": data["next_cursor"]
-                }))
+                with span("notion_request", kind="query"):
+                    response = requests.post(url, headers=headers, data=json.dumps({
+                        "page_size": 100,
+                        "start_cursor": data["next_cursor"]
+                    }))
                 if response.status_code == 200:
                     data = response.json()
                 else:
@@ -165,41 +175,33 @@ def load_weekly_articles(week_tag):
 
 def list_available_weekly_files():
     """List all available weekly JSON files with summaries"""
-    data_dir = "../../data"
-    
-    if not os.path.exists(data_dir):
-        print("❌ Data directory not found")
+    try:
+        weekly_files = [
+            (entry["week"], entry["article_count"], str(DATA_DIR / entry["file"]))
+            for entry in list_weeks()
+        ]
+    except Exception as e:
+        print(f"❌ Error reading data manifest: {e}")
         return
     
-    weekly_files = []
-    for filename in os.listdir(data_dir):
-        if filename.startswith("week-") and filename.endswith(".json"):
-            week_tag = filename.replace("week-", "").replace(".json", "")
-            file_path = os.path.join(data_dir, filename)
-            
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    article_count = len(data.get("articles", []))
-                    weekly_files.append((week_tag, article_count, file_path))
-            except Exception as e:
-                print(f"❌ Error reading {filename}: {e}")
-    
     if not weekly_files:
         print("❌ No weekly files found")
         return
     
     print(f"\n📊 Available weekly files:")
-    for week_tag, article_count, file_path in sorted(weekly_files, reverse=True):
+    for week_tag, article_count, file_path in weekly_files:
         print(f"   {week_tag}: {article_count} articles")
         print(f"      File: {file_path}")
         print()
 
 def upload_articles_to_notion(articles, existing_articles=None):
-    """Upload multiple articles to Notion, skipping existing ones"""
+    """Upload multiple articles to Notion, skipping existing ones
+
+    Returns the number of articles that failed to upload.
+    """
     if not articles:
         print("No articles to upload")
-        return
+        return 0
     
     if existing_articles is None:
         existing_articles = {}
@@ -218,7 +220,7 @@ def upload_articles_to_notion(articles, existing_articles=None):
     
     if not new_articles:
         print(f"✅ All {len(articles)} articles already exist in Notion database")
-        return
+        return 0
     
     success_count = 0
     total_count = len(new_articles)
@@ -237,6 +239,7 @@ def upload_articles_to_notion(articles, existing_articles=None):
     print(f"   ❌ Failed: {total_count - success_count}")
     print(f"   ⏭️  Skipped (already exist): {skipped_count}")
     print(f"   📈 Success rate: {(success_count/total_count)*100:.1f}%")
+    return total_count - success_count
 
 def main():
     print("🔗 MIT AI News -> Notion Uploader")
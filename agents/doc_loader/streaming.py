@@ -0,0 +1,374 @@
+"""
+Streaming ingest: each new article flows through the pipeline on its own.
+
+    fetch ──▶ summarize (N threads) ──▶ index ──▶ Notion
+          queue                     queue      queue
+
+Stages run concurrently and are connected by bounded queues
+(STREAM_QUEUE_SIZE), so a slow stage applies backpressure instead of
+buffering the whole feed. The index stage embeds the article into the
+vector store, adds it to the BM25 index and then writes it to the data files
+(raw feed and its weekly file, with summary); it takes whatever is queued, up
+to EMBED_BATCH_SIZE articles, so bursts are embedded in batches while a
+lone article is indexed immediately. After each batch the index generation
+(catalog.bump_generation) is incremented, which is what makes running web
+workers reload and see the new documents; every article's fetch-to-publish
+latency is recorded as a "freshness" span in the run report.
+
+watch() repeats this on an interval with jitter, for as long as it runs.
+The feed is requested conditionally (ETag / Last-Modified) before anything
+else, and the stages are only started when it has new articles, so an idle
+tick is one small HTTP request (plus a stat of the raw feed file when the
+feed changed) and writes no run report. The links already in the vector
+store and in Notion are kept between ticks instead of being re-queried.
+The feed's validators are only kept once a tick has streamed every new
+article; after a stage error the next tick fetches the whole feed again,
+and the articles that never reached the data files are retried.
+
+    python3 main.py stream
+    python3 main.py watch [interval-seconds]
+"""
+import os
+import sys
+import json
+import time
+import queue
+import random
+import signal
+import tempfile
+import threading
+import traceback
+
+import feedparser
+
+# Add the agents directory (and the project root, for rag/) to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from doc_loader.catalog import DATA_DIR, GENERAL_FILE, update_manifest, read_generation, bump_generation
+from doc_loader.tracing import span, record_span, traced_run
+from doc_loader.news_loader import rss_url, entry_to_article, summarize_news, get_week_start_end, parse_article_date
+from doc_loader.notion_loader import NOTION_TOKEN, DATABASE_ID, add_article_to_notion, get_existing_articles_from_notion
+
+STREAM_QUEUE_SIZE = int(os.environ.get("STREAM_QUEUE_SIZE", "8"))
+STREAM_SUMMARIZE_WORKERS = int(os.environ.get("STREAM_SUMMARIZE_WORKERS", "2"))
+WATCH_INTERVAL = float(os.environ.get("WATCH_INTERVAL", "300"))
+# Each sleep is the interval +/- this fraction, so several watchers don't poll in lockstep
+WATCH_JITTER = float(os.environ.get("WATCH_JITTER", "0.1"))
+# Pages can be added to the Notion database by hand, so its links are re-read this often (seconds)
+NOTION_LINKS_MAX_AGE = float(os.environ.get("NOTION_LINKS_MAX_AGE", "3600"))
+
+# Sentinel closing a queue; each stage passes it on once all its workers have finished
+DONE = object()
+
+class Item:
+    """An article in flight, with the time it was discovered in the feed."""
+
+    __slots__ = ("article", "discovered")
+
+    def __init__(self, article):
+        self.article = article
+        self.discovered = time.perf_counter()
+
+def _start_stage(name, worker, inbox, outbox, failed, workers=1):
+    """Run `worker(inbox, outbox)` on `workers` threads; send DONE downstream once all of them return.
+
+    `failed` (a threading.Event) is set if any of them crashes.
+    """
+    threads = [threading.Thread(target=_run_worker, args=(name, worker, inbox, outbox, failed), name=f"{name}-{i}",
+                                daemon=True)
+               for i in range(workers)]
+    for thread in threads:
+        thread.start()
+
+    def close():
+        for thread in threads:
+            thread.join()
+        if outbox is not None:
+            outbox.put(DONE)
+
+    closer = threading.Thread(target=close, name=f"{name}-close", daemon=True)
+    closer.start()
+    return closer
+
+def _run_worker(name, worker, inbox, outbox, failed):
+    try:
+        worker(inbox, outbox)
+    except Exception:
+        failed.set()
+        print(f"❌ {name} stage crashed:")
+        traceback.print_exc()
+        # Keep draining so upstream stages never block on a full queue
+        while inbox.get() is not DONE:
+            pass
+        inbox.put(DONE)
+
+def _take(inbox):
+    """Next item, or None once the queue is closed (DONE is put back for the other workers)."""
+    item = inbox.get()
+    if item is DONE:
+        inbox.put(DONE)
+        return None
+    return item
+
+# ----------------------
+# Stages
+# ----------------------
+# Validators of the last feed response whose new articles were all streamed, for conditional requests
+_feed_validators = {}
+# Article ids in the raw feed file, keyed by the file's stat signature
+_known_ids = {}
+# Links in the vector store, valid while the index generation is unchanged
+_known_links = {}
+# Links in the Notion database and when they were read
+_notion_links = {}
+
+def fetch_new_articles(max_articles=None):
+    """Parse the feed; returns (an Item for every article not yet in the raw feed file, the response's validators).
+
+    The validators are None on a 304. They are not remembered here: the caller
+    commits them to _feed_validators once the articles are safely streamed.
+    """
+    with span("feed_fetch", url=rss_url):
+        feed = feedparser.parse(rss_url, etag=_feed_validators.get("etag"), modified=_feed_validators.get("modified"))
+    if getattr(feed, "status", None) == 304:
+        return [], None
+    validators = {"etag": getattr(feed, "etag", None), "modified": getattr(feed, "modified", None)}
+    existing_ids = _existing_ids()
+
+    items = []
+    for entry in feed.entries[:max_articles]:
+        article = entry_to_article(entry)
+        if article["id"] in existing_ids:
+            continue
+        existing_ids.add(article["id"])
+        print(f"📰 New: {article['title']}")
+        items.append(Item(article))
+    return items, validators
+
+def summarize_worker(inbox, outbox):
+    while (item := _take(inbox)) is not None:
+        article = item.article
+        result = summarize_news(article["title"], article["content"], article["link"], article["date"],
+                                article["week"], save_to_file=False)
+        if result.get("error"):
+            # Indexed without a summary for now; the batch pipeline retries it (the weekly file changed)
+            print(f"⚠️ Summary failed for {article['title']}: {result['error']}")
+            article["summary"] = ""
+        else:
+            article["summary"] = result["summary"]
+        outbox.put(item)
+
+def index_worker(inbox, outbox, batch_size):
+    from rag.embedding import vector_store, lexical_index, LEXICAL_INDEX_PATH
+    from rag.indexing import new_documents, write_batch
+
+    summary_links, chunked_links = _vector_links(vector_store)
+    while (item := _take(inbox)) is not None:
+        # Whatever else is already waiting is embedded in the same batch
+        batch = [item]
+        while len(batch) < batch_size:
+            try:
+                more = inbox.get_nowait()
+            except queue.Empty:
+                break
+            if more is DONE:
+                inbox.put(DONE)
+                break
+            batch.append(more)
+
+        articles = [item.article for item in batch]
+        try:
+            with span("embed", count=len(articles)):
+                write_batch(vector_store, list(new_documents(articles, summary_links, chunked_links)))
+            with span("lexical_index", count=len(articles)):
+                for article in articles:
+                    lexical_index.add(article["link"], title=article["title"], summary=article["summary"],
+                                      content=article["content"], week=article["week"])
+                lexical_index.save(LEXICAL_INDEX_PATH)
+            # Last, so articles only count as known (see fetch_new_articles) once they are indexed
+            with span("persist", count=len(articles)):
+                write_articles(articles)
+        except Exception:
+            # new_documents() already marked the batch as stored; re-read the links next time
+            _known_links.clear()
+            raise
+        with span("publish", count=len(articles)):
+            generation = bump_generation(f"{len(articles)} streamed articles")
+        if _known_links.get("generation") == generation - 1:
+            # new_documents() added this batch to the sets, so they still match the store
+            _known_links["generation"] = generation
+
+        for item in batch:
+            record_span("freshness", item.discovered, article=item.article["title"])
+            print(f"🔎 Searchable after {time.perf_counter() - item.discovered:.1f}s "
+                  f"(index generation {generation}): {item.article['title']}")
+            if outbox is not None:
+                outbox.put(item)
+
+def notion_worker(inbox, outbox):
+    existing = None
+    while (item := _take(inbox)) is not None:
+        if existing is None:
+            existing = _notion_existing_links()
+        if item.article["link"] not in existing and add_article_to_notion(item.article):
+            existing.add(item.article["link"])
+
+def _vector_links(vector_store):
+    """(summary links, chunked links) in the vector store, re-read only when another process bumped the generation."""
+    generation = read_generation()
+    if _known_links.get("generation") != generation:
+        summary_links, chunked_links = set(), set()
+        try:
+            summary_links = vector_store.existing_links("summary")
+            chunked_links = vector_store.existing_links("content")
+        except Exception:
+            pass  # Empty store
+        _known_links.update(generation=generation, summary=summary_links, content=chunked_links)
+    return _known_links["summary"], _known_links["content"]
+
+def _notion_existing_links():
+    """Links in the Notion database, queried at most every NOTION_LINKS_MAX_AGE seconds."""
+    if not _notion_links or time.monotonic() - _notion_links["loaded"] > NOTION_LINKS_MAX_AGE:
+        links = set(get_existing_articles_from_notion())
+        if not links:
+            return links  # Failed (or empty) query; try again next time rather than keep it
+        _notion_links.update(loaded=time.monotonic(), links=links)
+    return _notion_links["links"]
+
+# ----------------------
+# Data files
+# ----------------------
+def _existing_ids():
+    path = DATA_DIR / GENERAL_FILE
+    try:
+        st = os.stat(path)
+        signature = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return set()
+    if _known_ids.get("signature") != signature:
+        _known_ids.update(signature=signature, ids={article.get("id") for article in _load_json(path, [])})
+    return set(_known_ids["ids"])
+
+def _load_json(path, default):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+def _write_json(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+def write_articles(articles):
+    """Add articles to the raw feed file and, with their summaries, to their weekly files."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    general_path = DATA_DIR / GENERAL_FILE
+    feed = _load_json(general_path, [])
+    known = {article.get("id") for article in feed}
+    feed.extend({k: v for k, v in article.items() if k != "summary"} for article in articles if article["id"] not in known)
+    _write_json(general_path, feed)
+    changed = [general_path]
+
+    by_week = {}
+    for article in articles:
+        by_week.setdefault(article["week"], []).append(article)
+    for week, week_articles in by_week.items():
+        path = DATA_DIR / f"week-{week}.json"
+        start_of_week, end_of_week = get_week_start_end(parse_article_date(week_articles[0]["date"]))
+        weekly = _load_json(path, {
+            "week": week,
+            "start_of_week": start_of_week.isoformat(),
+            "end_of_week": end_of_week.isoformat(),
+            "articles": [],
+        })
+        links = {article["link"] for article in week_articles}
+        fields = ("id", "title", "link", "date", "content", "summary", "week")
+        # Newest first, like the batch pipeline
+        weekly["articles"] = [{field: article.get(field) for field in fields} for article in week_articles] + \
+            [article for article in weekly["articles"] if article.get("link") not in links]
+        weekly["article_count"] = len(weekly["articles"])
+        _write_json(path, weekly)
+        changed.append(path)
+    update_manifest(*changed)
+
+# ----------------------
+# Runner
+# ----------------------
+def run_streaming(max_articles=None, summarize_workers=STREAM_SUMMARIZE_WORKERS, queue_size=STREAM_QUEUE_SIZE):
+    """Fetch the feed and stream every new article through summarize → index → Notion; returns articles queued."""
+    with span("fetch"):
+        items, validators = fetch_new_articles(max_articles)
+    if not items:
+        if validators:
+            _feed_validators.update(validators)
+        return 0
+
+    # Loaded once per process; later watch ticks reuse the model and stores
+    with span("load_models"):
+        from rag.embedding import EMBED_BATCH_SIZE
+
+    to_summarize = queue.Queue(maxsize=queue_size)
+    to_index = queue.Queue(maxsize=queue_size)
+    upload = NOTION_TOKEN and DATABASE_ID
+    to_notion = queue.Queue(maxsize=queue_size) if upload else None
+    failed = threading.Event()
+
+    stages = [
+        _start_stage("summarize", summarize_worker, to_summarize, to_index, failed, workers=summarize_workers),
+        _start_stage("index", lambda inbox, outbox: index_worker(inbox, outbox, EMBED_BATCH_SIZE),
+                     to_index, to_notion, failed),
+    ]
+    if upload:
+        stages.append(_start_stage("notion", notion_worker, to_notion, None, failed))
+    else:
+        print("❌ Notion credentials not found, skipping Notion upload")
+
+    try:
+        for item in items:
+            to_summarize.put(item)
+    finally:
+        to_summarize.put(DONE)
+    for stage in stages:
+        stage.join()
+    if failed.is_set():
+        # Keep the old validators so the next tick gets the full feed instead of a 304
+        raise RuntimeError("A streaming stage failed; the feed will be fetched again on the next run")
+    _feed_validators.update(validators)
+    print(f"✅ Streamed {len(items)} new articles")
+    return len(items)
+
+# ----------------------
+# Watch mode
+# ----------------------
+def watch(interval=WATCH_INTERVAL, jitter=WATCH_JITTER, max_ticks=None):
+    """Poll the feed every `interval` seconds (with jitter) and stream new articles until SIGINT/SIGTERM."""
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+
+    print(f"👀 Watching {rss_url} every {interval:.0f}s (±{jitter:.0%})")
+    ticks = 0
+    while not stop.is_set():
+        try:
+            with traced_run("watch") as run:
+                queued = run_streaming()
+                run.discard = not queued
+        except Exception as e:
+            # A failed tick (feed down, LLM errors, ...) is retried at the next one
+            print(f"❌ Watch tick failed: {e}")
+        ticks += 1
+        if max_ticks and ticks >= max_ticks:
+            break
+        stop.wait(interval * random.uniform(1 - jitter, 1 + jitter))
+    print("👋 Watcher stopped")
+
+if __name__ == "__main__":
+    with traced_run("stream"):
+        run_streaming()
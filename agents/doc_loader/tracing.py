@@ -0,0 +1,229 @@
+"""
+Stage and per-article timing for the ingest pipeline.
+
+main.py wraps each pipeline run in traced_run(); inside it, span() records
+how long each stage and each per-article step takes (feed fetch, parsing,
+LLM summarization, Notion requests, ...). When the run ends a JSON report is
+written to data/pipeline_runs/, with every span plus per-name totals, so
+runs can be compared:
+
+    python3 tracing.py compare 5     # stage totals for the last 5 runs
+    python3 tracing.py show          # the latest run's report
+
+Outside a traced run span() does nothing, so the loader functions can be
+called on their own as before.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+
+# Add the agents directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from doc_loader.catalog import DATA_DIR
+
+RUNS_DIR = os.environ.get("PIPELINE_RUNS_DIR") or str(DATA_DIR / "pipeline_runs")
+
+_lock = threading.Lock()
+_local = threading.local()
+_current = None
+
+class PipelineRun:
+    """Spans recorded during one pipeline run."""
+
+    def __init__(self, command):
+        self.id = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self.command = command
+        self.started_at = datetime.now().isoformat()
+        self.start = time.perf_counter()
+        self.spans = []
+        self.status = "running"
+        self.error = None
+        # Set by the caller to drop the report of a run that did nothing (e.g. an idle watch tick)
+        self.discard = False
+
+    def add(self, span):
+        with _lock:
+            self.spans.append(span)
+
+    def report(self):
+        with _lock:
+            spans = sorted(self.spans, key=lambda span: span["start_s"])
+        return {
+            "run_id": self.id,
+            "command": self.command,
+            "started_at": self.started_at,
+            "duration_s": round(time.perf_counter() - self.start, 4),
+            "status": self.status,
+            "error": self.error,
+            "stages": summarize_spans(spans),
+            "spans": spans,
+        }
+
+def summarize_spans(spans):
+    """Per span name: count, total, mean, p50 and max seconds, and how many failed."""
+    by_name = {}
+    for span in spans:
+        by_name.setdefault(span["name"], []).append(span)
+    stages = {}
+    for name, items in by_name.items():
+        durations = sorted(span["duration_s"] for span in items)
+        stages[name] = {
+            "count": len(items),
+            "total_s": round(sum(durations), 4),
+            "mean_s": round(sum(durations) / len(durations), 4),
+            "p50_s": durations[len(durations) // 2],
+            "max_s": durations[-1],
+            "errors": sum(1 for span in items if span.get("error")),
+        }
+    return stages
+
+@contextmanager
+def span(name, **attrs):
+    """Time a block as a span of the current run, nested under the enclosing span on this thread."""
+    run = _current
+    if run is None:
+        yield
+        return
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    record = {
+        "name": name,
+        "parent": stack[-1]["name"] if stack else None,
+        "start_s": round(time.perf_counter() - run.start, 4),
+        "attrs": attrs,
+    }
+    stack.append(record)
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        stack.pop()
+        record["duration_s"] = round(time.perf_counter() - start, 4)
+        run.add(record)
+
+def record_span(name, started, **attrs):
+    """Record a span that began at perf_counter() value `started` and ends now (e.g. one measured across threads)."""
+    run = _current
+    if run is None:
+        return
+    run.add({
+        "name": name,
+        "parent": None,
+        "start_s": round(started - run.start, 4),
+        "attrs": attrs,
+        "duration_s": round(time.perf_counter() - started, 4),
+    })
+
+def mark_error(message):
+    """Flag the innermost open span as failed without raising (for steps that catch their own errors)."""
+    stack = getattr(_local, "stack", None)
+    if _current is not None and stack:
+        stack[-1]["error"] = message
+
+@contextmanager
+def traced_run(command):
+    """Record a pipeline run and write its report to RUNS_DIR when it ends."""
+    global _current
+    run = PipelineRun(command)
+    _current = run
+    try:
+        yield run
+        run.status = "ok"
+    except BaseException as e:
+        run.status = "error"
+        run.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current = None
+        if not run.discard or run.status == "error":
+            path = save_report(run.report())
+            print(f"⏱️ Run report written to {path}")
+
+def save_report(report):
+    os.makedirs(RUNS_DIR, exist_ok=True)
+    path = os.path.join(RUNS_DIR, f"run-{report['run_id']}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return path
+
+def load_reports(count=None):
+    """Run reports, oldest first; the last `count` if given."""
+    if not os.path.isdir(RUNS_DIR):
+        return []
+    names = sorted(name for name in os.listdir(RUNS_DIR) if name.startswith("run-") and name.endswith(".json"))
+    if count:
+        names = names[-count:]
+    reports = []
+    for name in names:
+        try:
+            with open(os.path.join(RUNS_DIR, name), "r", encoding="utf-8") as f:
+                reports.append(json.load(f))
+        except (OSError, json.JSONDecodeError):
+            print(f"⚠️ Skipping unreadable run report: {name}")
+    return reports
+
+# ----------------------
+# Comparison
+# ----------------------
+def compare_runs(count=5, command=None):
+    """Print total seconds per span name for the last `count` runs, with the latest run's change vs the median of the rest."""
+    reports = [r for r in load_reports() if command is None or r["command"] == command][-count:]
+    if not reports:
+        print(f"No run reports in {RUNS_DIR}")
+        return
+
+    names = []
+    for report in reports:
+        names.extend(name for name in report["stages"] if name not in names)
+    rows = [("run", [report["run_id"][:15] for report in reports], "")]
+    rows.append(("command", [report["command"] for report in reports], ""))
+    rows.append(("status", [report["status"] for report in reports], ""))
+    rows.append(("TOTAL", [f"{report['duration_s']:.2f}" for report in reports],
+                 _change([report["duration_s"] for report in reports])))
+    for name in names:
+        totals = [report["stages"].get(name, {}).get("total_s") for report in reports]
+        cells = ["-" if total is None else f"{total:.2f}" for total in totals]
+        rows.append((name, cells, _change(totals)))
+
+    label_width = max(len(row[0]) for row in rows)
+    cell_width = max(15, max(len(cell) for row in rows for cell in row[1]))
+    for label, cells, change in rows:
+        print(f"{label:<{label_width}}  " + "  ".join(f"{cell:>{cell_width}}" for cell in cells) + f"  {change}")
+
+def _change(values):
+    """Latest value relative to the median of the earlier ones, e.g. '+35%'."""
+    latest, earlier = values[-1], sorted(v for v in values[:-1] if v is not None)
+    if latest is None or not earlier:
+        return ""
+    baseline = earlier[len(earlier) // 2]
+    if not baseline:
+        return ""
+    return f"{(latest - baseline) / baseline:+.0%}"
+
+def main():
+    args = sys.argv[1:]
+    if args and args[0] == "compare":
+        count = int(args[1]) if len(args) > 1 else 5
+        compare_runs(count, command=args[2] if len(args) > 2 else None)
+    elif args and args[0] == "show":
+        reports = load_reports(1)
+        if reports:
+            print(json.dumps({k: v for k, v in reports[-1].items() if k != "spans"}, indent=2))
+        else:
+            print(f"No run reports in {RUNS_DIR}")
+    else:
+        print("Usage:")
+        print("  python3 tracing.py compare [N] [command]  - Stage totals of the last N runs (default 5)")
+        print("  python3 tracing.py show                   - Summary of the latest run")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Deterministic offline chat model for load tests and local development.
+
+Selected with LLM_PROVIDER=fake (see gateway.py). Replies are derived from a
+hash of the prompt, so the same request always gets the same answer, and
+every call waits LLM_FAKE_LATENCY seconds to stand in for the model's
+response time. No API key or network access is needed.
+"""
+import time
+import random
+import asyncio
+import hashlib
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+VOCABULARY = """
+model data research learning neural network researchers system results training
+language vision robot health energy climate chip design approach method study
+performance accuracy efficient scale benchmark dataset inference reasoning
+""".split()
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that answers instantly-but-for-latency with deterministic text."""
+
+    model_name: str = "fake"
+    latency: float = 0.5
+    reply_words: int = 80
+
+    @property
+    def _llm_type(self):
+        return "fake-chat"
+
+    def _reply(self, messages):
+        prompt = "\n".join(str(message.content) for message in messages)
+        rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).hexdigest())
+        text = " ".join(rng.choice(VOCABULARY) for _ in range(self.reply_words))
+        # Roughly four characters per token, like OpenAI's tokenizer on English
+        usage = {
+            "prompt_tokens": len(prompt) // 4,
+            "completion_tokens": self.reply_words,
+            "total_tokens": len(prompt) // 4 + self.reply_words,
+        }
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=text))],
+            llm_output={"token_usage": usage, "model_name": self.model_name},
+        )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        return self._reply(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        return self._reply(messages)
@@ -0,0 +1,249 @@
+"""
+Shared LLM client gateway.
+
+Every agent (chat bot, weekly reporter, news summarizer) gets its chat model
+from here, so the HTTP connection pool, timeouts, retry policy, priority
+scheduling and usage metrics are tuned in one place.
+
+Set OPENAI_BASE_URL to point the gateway at a local OpenAI-compatible stub
+server when testing, or LLM_PROVIDER=fake to run fully offline with the
+deterministic model in fake.py (still scheduled and metered here).
+"""
+import os
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+
+import httpx
+from openai import APIConnectionError, APIStatusError, RateLimitError
+from langchain_openai import ChatOpenAI
+from dotenv import load_dotenv
+
+from llm.scheduler import PRIORITIES, PriorityScheduler, SqliteTokenBucket
+from llm.fake import FakeChatModel
+
+load_dotenv()
+OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
+OPENAI_BASE_URL = os.environ.get("OPENAI_BASE_URL") or None
+
+# "openai" (default) or "fake" for offline load tests
+LLM_PROVIDER = os.environ.get("LLM_PROVIDER", "openai")
+LLM_FAKE_LATENCY = float(os.environ.get("LLM_FAKE_LATENCY", "0.5"))
+LLM_MODEL = os.environ.get("LLM_MODEL", "gpt-4o-mini")
+LLM_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", "30"))
+LLM_CONNECT_TIMEOUT = float(os.environ.get("LLM_CONNECT_TIMEOUT", "5"))
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.environ.get("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.environ.get("LLM_BACKOFF_MAX", "20"))
+LLM_MAX_IN_FLIGHT = int(os.environ.get("LLM_MAX_IN_FLIGHT", "8"))
+LLM_POOL_SIZE = int(os.environ.get("LLM_POOL_SIZE", "20"))
+
+# ----------------------
+# Connection pool
+# ----------------------
+_limits = httpx.Limits(max_connections=LLM_POOL_SIZE, max_keepalive_connections=LLM_POOL_SIZE)
+_timeout = httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+
+http_client = httpx.Client(limits=_limits, timeout=_timeout)
+http_async_client = httpx.AsyncClient(limits=_limits, timeout=_timeout)
+
+# ----------------------
+# Admission control
+# ----------------------
+LLM_RATE_PER_SEC = float(os.environ.get("LLM_RATE_PER_SEC", "0"))
+LLM_BUCKET_CAPACITY = float(os.environ.get("LLM_BUCKET_CAPACITY", "20"))
+LLM_BUCKET_PATH = os.environ.get(
+    "LLM_BUCKET_PATH",
+    os.path.join(os.path.dirname(__file__), "..", "..", "data", ".llm_bucket.sqlite3"),
+)
+LLM_REPORT_SHARE = float(os.environ.get("LLM_REPORT_SHARE", "0.75"))
+LLM_BATCH_SHARE = float(os.environ.get("LLM_BATCH_SHARE", "0.5"))
+
+# Rate limiting across processes is opt-in: it only makes sense once LLM_RATE_PER_SEC
+# is set to the account's request quota
+bucket = (
+    SqliteTokenBucket(LLM_BUCKET_PATH, LLM_RATE_PER_SEC, LLM_BUCKET_CAPACITY)
+    if LLM_RATE_PER_SEC > 0 else None
+)
+
+scheduler = PriorityScheduler(
+    LLM_MAX_IN_FLIGHT,
+    class_shares={"report": LLM_REPORT_SHARE, "batch": LLM_BATCH_SHARE},
+    bucket=bucket,
+    # Lower classes leave part of the shared bucket untouched for interactive traffic
+    bucket_reserves={"report": LLM_BUCKET_CAPACITY * 0.1, "batch": LLM_BUCKET_CAPACITY * 0.25},
+)
+
+# ----------------------
+# Metrics
+# ----------------------
+class LLMMetrics:
+    """Aggregate and recent per-call latency/token counters."""
+
+    def __init__(self, recent_size=200):
+        self._lock = threading.Lock()
+        self.recent = deque(maxlen=recent_size)
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def record(self, model, priority, latency, attempts, usage=None, error=None):
+        usage = usage or {}
+        prompt_tokens = usage.get("prompt_tokens", 0) or 0
+        completion_tokens = usage.get("completion_tokens", 0) or 0
+        with self._lock:
+            self.calls += 1
+            self.retries += attempts - 1
+            if error:
+                self.errors += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+            self.recent.append({
+                "model": model,
+                "priority": priority,
+                "latency": round(latency, 4),
+                "attempts": attempts,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "error": error,
+            })
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "retries": self.retries,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "latency_avg": self.latency_total / self.calls if self.calls else 0.0,
+                "latency_max": self.latency_max,
+                "scheduler": scheduler.snapshot(),
+                "recent": list(self.recent),
+            }
+
+metrics = LLMMetrics()
+
+def get_llm_metrics():
+    """Return a snapshot of gateway metrics."""
+    return metrics.snapshot()
+
+# ----------------------
+# Retry policy
+# ----------------------
+def _is_retryable(error):
+    if isinstance(error, RateLimitError):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code >= 500
+    # Covers timeouts as well (APITimeoutError subclasses APIConnectionError)
+    return isinstance(error, APIConnectionError)
+
+def _backoff_delay(attempt, error):
+    """Exponential backoff with full jitter, honouring Retry-After when the server sends it."""
+    response = getattr(error, "response", None)
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        try:
+            if retry_after is not None:
+                return min(float(retry_after), LLM_BACKOFF_MAX)
+        except ValueError:
+            pass
+    return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * (2 ** attempt)))
+
+def _token_usage(result):
+    llm_output = getattr(result, "llm_output", None) or {}
+    return llm_output.get("token_usage") or {}
+
+# ----------------------
+# Chat model
+# ----------------------
+class _GatewayPolicy:
+    """Routes every call of the chat model it is mixed into through the scheduler, retry loop and metrics."""
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            scheduler.acquire(self.priority)
+            try:
+                result = super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            except Exception as e:
+                error = e
+            else:
+                error = None
+            finally:
+                scheduler.release(self.priority)
+
+            if error is None:
+                metrics.record(self.model_name, self.priority, time.perf_counter() - start, attempt + 1, _token_usage(result))
+                return result
+            if attempt >= LLM_MAX_RETRIES or not _is_retryable(error):
+                metrics.record(self.model_name, self.priority, time.perf_counter() - start, attempt + 1, error=type(error).__name__)
+                raise error
+            time.sleep(_backoff_delay(attempt, error))
+            attempt += 1
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            await scheduler.acquire_async(self.priority)
+            try:
+                result = await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            except Exception as e:
+                error = e
+            else:
+                error = None
+            finally:
+                scheduler.release(self.priority)
+
+            if error is None:
+                metrics.record(self.model_name, self.priority, time.perf_counter() - start, attempt + 1, _token_usage(result))
+                return result
+            if attempt >= LLM_MAX_RETRIES or not _is_retryable(error):
+                metrics.record(self.model_name, self.priority, time.perf_counter() - start, attempt + 1, error=type(error).__name__)
+                raise error
+            await asyncio.sleep(_backoff_delay(attempt, error))
+            attempt += 1
+
+class GatewayChatOpenAI(_GatewayPolicy, ChatOpenAI):
+    """ChatOpenAI bound to the gateway policy."""
+
+    priority: str = "interactive"
+
+class GatewayFakeChatModel(_GatewayPolicy, FakeChatModel):
+    """Offline fake model bound to the gateway policy, so load tests exercise admission control too."""
+
+    priority: str = "interactive"
+
+def get_chat_model(model=None, priority="interactive", **kwargs):
+    """Return a chat model bound to the shared connection pool and gateway policy.
+
+    `priority` is one of "interactive", "report" or "batch" and decides how the
+    scheduler admits the model's calls when the quota is contended.
+    """
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown LLM priority: {priority}")
+    if LLM_PROVIDER == "fake":
+        return GatewayFakeChatModel(model_name=model or "fake", priority=priority, latency=LLM_FAKE_LATENCY)
+    return GatewayChatOpenAI(
+        model=model or LLM_MODEL,
+        priority=priority,
+        api_key=OPENAI_API_KEY,
+        base_url=OPENAI_BASE_URL,
+        timeout=_timeout,
+        # Retries are handled by the gateway so backoff and metrics stay in one place
+        max_retries=0,
+        http_client=http_client,
+        http_async_client=http_async_client,
+        **kwargs,
+    )
@@ -0,0 +1,250 @@
+"""
+Priority-aware admission control for LLM calls.
+
+Calls are admitted in priority order (interactive > report > batch). Lower
+classes may only use part of the in-flight slots and must leave headroom in
+the shared token bucket, so a bulk summarization backfill cannot starve chat.
+
+The token bucket lives in a small SQLite file so every process on the host
+(web workers and the ingest pipeline) draws from the same request budget.
+"""
+import os
+import time
+import heapq
+import asyncio
+import sqlite3
+import itertools
+import threading
+from collections import defaultdict
+
+PRIORITIES = {"interactive": 0, "report": 1, "batch": 2}
+
+# ----------------------
+# Shared token bucket
+# ----------------------
+class SqliteTokenBucket:
+    """Request-rate token bucket shared across processes through a SQLite file."""
+
+    def __init__(self, path, rate, capacity, name="openai"):
+        self.path = path
+        self.rate = rate
+        self.capacity = capacity
+        self.name = name
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL, updated REAL)"
+        )
+        conn.execute(
+            "INSERT OR IGNORE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+            (name, capacity, time.time()),
+        )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode; transactions are opened explicitly with BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def try_take(self, cost=1.0, reserve=0.0):
+        """Take `cost` tokens if `cost + reserve` are available.
+
+        Returns 0 on success, otherwise the number of seconds to wait before retrying.
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            tokens, updated = conn.execute(
+                "SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)
+            ).fetchone()
+            now = time.time()
+            tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+            needed = cost + reserve
+            if tokens >= needed:
+                tokens -= cost
+                wait = 0.0
+            else:
+                wait = (needed - tokens) / self.rate
+            conn.execute(
+                "UPDATE buckets SET tokens = ?, updated = ? WHERE name = ?",
+                (tokens, now, self.name),
+            )
+            conn.execute("COMMIT")
+            return wait
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+# ----------------------
+# Scheduler
+# ----------------------
+class _Ticket:
+    __slots__ = ("priority", "klass", "enqueued", "loop", "wake")
+
+    def __init__(self, klass, loop=None):
+        self.klass = klass
+        self.priority = PRIORITIES[klass]
+        self.enqueued = time.perf_counter()
+        # Async waiters sleep on an event set from whichever thread frees their slot
+        self.loop = loop
+        self.wake = asyncio.Event() if loop is not None else None
+
+class PriorityScheduler:
+    """Grants in-flight LLM slots by priority class, then draws from the shared bucket."""
+
+    def __init__(self, max_in_flight, class_shares=None, bucket=None, bucket_reserves=None):
+        self.max_in_flight = max_in_flight
+        class_shares = class_shares or {}
+        self.class_limits = {
+            klass: max(1, int(max_in_flight * class_shares.get(klass, 1.0)))
+            for klass in PRIORITIES
+        }
+        self.bucket = bucket
+        self.bucket_reserves = bucket_reserves or {}
+        self._cond = threading.Condition()
+        self._heap = []
+        self._seq = itertools.count()
+        self.in_flight = 0
+        self._in_flight_by_class = defaultdict(int)
+        self._waiting_by_class = defaultdict(int)
+        self._granted_by_class = defaultdict(int)
+        self._wait_total_by_class = defaultdict(float)
+        self._wait_max_by_class = defaultdict(float)
+        self._max_queue_depth = 0
+
+    # --- queue bookkeeping (caller holds self._cond) ---
+    def _enqueue(self, ticket):
+        heapq.heappush(self._heap, (ticket.priority, next(self._seq), ticket))
+        self._waiting_by_class[ticket.klass] += 1
+        self._max_queue_depth = max(self._max_queue_depth, len(self._heap))
+
+    def _can_grant(self, ticket):
+        return (
+            self._heap[0][2] is ticket
+            and self.in_flight < self.max_in_flight
+            and self._in_flight_by_class[ticket.klass] < self.class_limits[ticket.klass]
+        )
+
+    def _grant(self, ticket):
+        heapq.heappop(self._heap)
+        self._waiting_by_class[ticket.klass] -= 1
+        self.in_flight += 1
+        self._in_flight_by_class[ticket.klass] += 1
+
+    def _discard(self, ticket):
+        self._heap = [entry for entry in self._heap if entry[2] is not ticket]
+        heapq.heapify(self._heap)
+        self._waiting_by_class[ticket.klass] -= 1
+        self._notify()
+
+    def _notify(self):
+        """Wake waiters after a slot or the head of the queue changed; only the head can be granted."""
+        self._cond.notify_all()
+        if self._heap:
+            head = self._heap[0][2]
+            if head.wake is not None:
+                head.loop.call_soon_threadsafe(head.wake.set)
+
+    def _record_wait(self, ticket):
+        waited = time.perf_counter() - ticket.enqueued
+        with self._cond:
+            self._granted_by_class[ticket.klass] += 1
+            self._wait_total_by_class[ticket.klass] += waited
+            self._wait_max_by_class[ticket.klass] = max(self._wait_max_by_class[ticket.klass], waited)
+
+    # --- public API ---
+    def acquire(self, klass="interactive"):
+        """Block until a slot for `klass` is granted."""
+        ticket = _Ticket(klass)
+        with self._cond:
+            self._enqueue(ticket)
+            while not self._can_grant(ticket):
+                self._cond.wait()
+            self._grant(ticket)
+            self._notify()
+        try:
+            self._take_bucket(ticket)
+        except BaseException:
+            self.release(klass)
+            raise
+        self._record_wait(ticket)
+
+    async def acquire_async(self, klass="interactive"):
+        """Wait for a slot for `klass` without pinning a thread; woken by _notify() when it may be granted."""
+        ticket = _Ticket(klass, loop=asyncio.get_running_loop())
+        with self._cond:
+            self._enqueue(ticket)
+        try:
+            while True:
+                with self._cond:
+                    if self._can_grant(ticket):
+                        self._grant(ticket)
+                        self._notify()
+                        break
+                    # Cleared under the lock, so a release after this check still wakes us
+                    ticket.wake.clear()
+                await ticket.wake.wait()
+        except BaseException:
+            with self._cond:
+                self._discard(ticket)
+            raise
+        try:
+            await self._take_bucket_async(ticket)
+        except BaseException:
+            self.release(klass)
+            raise
+        self._record_wait(ticket)
+
+    def release(self, klass="interactive"):
+        with self._cond:
+            self.in_flight -= 1
+            self._in_flight_by_class[klass] -= 1
+            self._notify()
+
+    def _take_bucket(self, ticket):
+        if self.bucket is None:
+            return
+        reserve = self.bucket_reserves.get(ticket.klass, 0.0)
+        while True:
+            wait = self.bucket.try_take(reserve=reserve)
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def _take_bucket_async(self, ticket):
+        if self.bucket is None:
+            return
+        reserve = self.bucket_reserves.get(ticket.klass, 0.0)
+        while True:
+            # try_take can wait up to the SQLite busy timeout on another worker's write; keep that off the event loop
+            wait = await asyncio.to_thread(self.bucket.try_take, reserve=reserve)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def snapshot(self):
+        """Return queue depth, in-flight and wait-time counters per priority class."""
+        with self._cond:
+            return {
+                "in_flight": self.in_flight,
+                "queue_depth": len(self._heap),
+                "max_queue_depth": self._max_queue_depth,
+                "classes": {
+                    klass: {
+                        "in_flight": self._in_flight_by_class[klass],
+                        "waiting": self._waiting_by_class[klass],
+                        "limit": self.class_limits[klass],
+                        "granted": self._granted_by_class[klass],
+                        "wait_avg": (
+                            self._wait_total_by_class[klass] / self._granted_by_class[klass]
+                            if self._granted_by_class[klass] else 0.0
+                        ),
+                        "wait_max": self._wait_max_by_class[klass],
+                    }
+                    for klass in PRIORITIES
+                },
+            }
@@ -1,60 +1,99 @@
 import os
 import json
-from flask import Flask, render_template, request, jsonify
+import time
+from flask import Flask, Response, g, render_template, request, jsonify
 from dotenv import load_dotenv
 from agents.chat_bot.chat import chain_with_history
+# chat.py puts agents/ on sys.path; import the gateway the same way so its metrics are the ones in use
+from llm.gateway import get_llm_metrics, scheduler as llm_scheduler
 from agents.reporter.report_bot import generate_weekly_summary
 from agents.doc_loader.news_loader import get_week_tag
-from rag.embedding import vector_store, distance_to_confidence, initialize_vector_store
+from agents.doc_loader.catalog import DATA_DIR, GENERATION_FILE, load_manifest, list_weeks, read_generation, forget_manifest
+from rag.embedding import embeddings, vector_store, lexical_index, distance_to_confidence, reload_stores
+from rag.lexical import reciprocal_rank_fusion
+from rag.chunking import EMBED_FULL_CONTENT
+from web.jobs import SingleFlight, JobQueue
+from web.http_cache import JsonPayload, cached_json_response, content_hash, stat_signature
+from web.metrics import CONTENT_TYPE, registry, request_latency, stage_timer, cache_lookup, scheduler_gauges
+from web import profiling
+from web.index_watch import GenerationWatcher
 import uuid
-from pathlib import Path
+import threading
+from collections import OrderedDict
 import markdown
 
 load_dotenv()
 
 app = Flask(__name__)
 
-# Initialize vector store on startup
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+
+# Identical concurrent requests share one computation
+search_flight = SingleFlight()
+summary_flight = SingleFlight()
+jobs = JobQueue(os.path.join(DATA_DIR, ".jobs.sqlite3"), max_workers=JOB_WORKERS)
+
+# Workers only read the search indexes; init_vector_store.py and the ingest pipeline write them
 try:
-    initialize_vector_store()
-    print("✅ Vector store initialized successfully")
+    document_count = vector_store.count()
+    print(f"✅ Vector store loaded ({document_count} documents, {len(lexical_index)} articles in the BM25 index)")
+    if not document_count:
+        print("💡 Run python3 init_vector_store.py to index the data files")
 except Exception as e:
-    print(f"⚠️ Warning: Could not initialize vector store: {e}")
+    print(f"⚠️ Warning: Could not open vector store: {e}")
     print("Search functionality may not work properly")
 
 # ----------------------
 # Load news data function
 # ----------------------
-def load_news_data(week_tag=None):
-    """Load news data from JSON files and convert Markdown summaries to HTML."""
-    try:
-        data = None
-
-        # Try weekly file
-        if week_tag:
-            weekly_file = f"data/week-{week_tag}.json"
-            if os.path.exists(weekly_file):
-                with open(weekly_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-
-        # Fallback to most recent week or general news
-        if not data:
-            current_week = get_week_tag()
-            weekly_file = f"data/week-{current_week}.json"
-            if os.path.exists(weekly_file):
-                with open(weekly_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-            else:
-                with open('data/mit_ai_news.json', 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-
-        # Ensure data is a dict
-        if isinstance(data, list):
-            data = {"articles": data, "week": week_tag or "all"}
-        else:
-            data["week"] = data.get("week") or week_tag or "all"
-
-        # Convert Markdown to HTML and add safe defaults
+NEWS_CACHE_MAX_AGE = int(os.environ.get("NEWS_CACHE_MAX_AGE", "60"))
+
+# Parsed payloads keyed by data file; rebuilt only when the file's stat signature changes
+_news_cache = {}
+_weeks_cache = {}
+
+def resolve_news_file(week_tag=None):
+    """Return the data file serving week_tag, falling back to the current week, then all news."""
+    if week_tag:
+        weekly_file = os.path.join(DATA_DIR, f"week-{week_tag}.json")
+        if os.path.exists(weekly_file):
+            return weekly_file
+
+    current_week = get_week_tag()
+    weekly_file = os.path.join(DATA_DIR, f"week-{current_week}.json")
+    if os.path.exists(weekly_file):
+        return weekly_file
+    return os.path.join(DATA_DIR, 'mit_ai_news.json')
+
+def load_news_payload(week_tag=None):
+    """Load news data as a cached JsonPayload, re-reading the data file only when it changes."""
+    path = resolve_news_file(week_tag)
+    # Only a week tag that selected its own file labels the payload; this also keeps
+    # arbitrary ?week= values from growing the cache
+    if path != os.path.join(DATA_DIR, f"week-{week_tag}.json"):
+        week_tag = None
+    return load_file_payload(path, week_tag)
+
+def load_file_payload(path, week_tag=None):
+    """Load one data file as a cached JsonPayload."""
+    signature = stat_signature(path)
+    cached = _news_cache.get((path, week_tag))
+    if cache_lookup("news", cached and cached[0] == signature):
+        return cached[1]
+
+    with stage_timer("json_load"):
+        with open(path, 'rb') as f:
+            raw = f.read()
+        data = json.loads(raw)
+
+    # Ensure data is a dict
+    if isinstance(data, list):
+        data = {"articles": data, "week": week_tag or "all"}
+    else:
+        data["week"] = data.get("week") or week_tag or "all"
+
+    # Convert Markdown to HTML and add safe defaults
+    with stage_timer("markdown_render"):
         for article in data.get("articles", []):
             summary_md = article.get("summary") or ""
             try:
@@ -66,8 +105,21 @@ def load_news_data(week_tag=None):
             article["link"] = article.get("link") or "#"
             article["date"] = article.get("date") or ""
 
-        return data
+    payload = JsonPayload(
+        data,
+        etag=content_hash(raw + (week_tag or "").encode("utf-8")),
+        last_modified=signature[0] / 1e9 if signature else None,
+    )
+    _news_cache[(path, week_tag)] = (signature, payload)
+    return payload
 
+def load_news_data(week_tag=None):
+    """Load news data from JSON files and convert Markdown summaries to HTML.
+
+    The returned dict is shared between requests; treat it as read-only.
+    """
+    try:
+        return load_news_payload(week_tag).data
     except Exception as e:
         print(f"Error loading news data: {e}")
         return {"articles": [], "week": "Unknown"}
@@ -75,47 +127,260 @@ def load_news_data(week_tag=None):
 # ----------------------
 # Available weeks
 # ----------------------
-def get_available_weeks():
+def load_weeks_payload():
+    """List available weeks as a cached JsonPayload, rebuilt only when the data manifest changes."""
+    manifest = load_manifest()
+    cached = _weeks_cache.get("weeks")
+    if cache_lookup("weeks", cached and cached[0] is manifest):
+        return cached[1]
+
     weeks = []
-    data_dir = Path("data")
 
     # General news
-    if (data_dir / "mit_ai_news.json").exists():
+    if "all" in manifest["weeks"]:
         weeks.append({"value": "all", "label": "All Articles"})
 
     # Weekly files
-    for file_path in data_dir.glob("week-*.json"):
-        week_name = file_path.stem.replace("week-", "")
-        weeks.append({"value": week_name, "label": f"Week {week_name}"})
+    for entry in list_weeks():
+        weeks.append({"value": entry["week"], "label": f"Week {entry['week']}"})
+
+    payload = JsonPayload(
+        weeks,
+        etag=content_hash(json.dumps(weeks).encode("utf-8")),
+        last_modified=max((entry["mtime"] for entry in manifest["weeks"].values()), default=None),
+    )
+    _weeks_cache["weeks"] = (manifest, payload)
+    return payload
+
+def get_available_weeks():
+    return load_weeks_payload().data
 
-    weeks.sort(key=lambda x: x["value"], reverse=True)
-    return weeks
+# ----------------------
+# Projection, pagination and article lookup
+# ----------------------
+# Fields the news list in static/js/app.js actually renders
+LIST_FIELDS = ("id", "title", "date", "link", "summary")
+MAX_PAGE_SIZE = 200
+PROJECTION_CACHE_SIZE = 256
+
+_projection_cache = OrderedDict()
+_projection_lock = threading.Lock()
+_article_index_cache = {}
+
+def parse_fields(fields_arg, view=None):
+    """Normalize a `fields=a,b` argument (or `view=list`) into a sorted tuple, or None for all fields."""
+    if view == "list":
+        return tuple(sorted(LIST_FIELDS))
+    if not fields_arg:
+        return None
+    return tuple(sorted({f.strip() for f in fields_arg.split(",") if f.strip()}))
+
+def project_payload(payload, fields=None, offset=0, limit=None):
+    """Return a JsonPayload holding one page of payload's articles, restricted to `fields`."""
+    key = (payload.etag, fields, offset, limit)
+    with _projection_lock:
+        projected = _projection_cache.get(key)
+        if cache_lookup("projection", projected is not None):
+            _projection_cache.move_to_end(key)
+            return projected
+
+    articles = payload.data.get("articles", [])
+    end = offset + limit if limit is not None else None
+    page = articles[offset:end]
+    if fields:
+        page = [{field: article[field] for field in fields if field in article} for article in page]
+
+    data = {k: v for k, v in payload.data.items() if k != "articles"}
+    data.update({"articles": page, "total": len(articles), "offset": offset, "limit": limit})
+    projected = JsonPayload(
+        data,
+        etag=content_hash(f"{payload.etag}|{','.join(fields or ())}|{offset}|{limit}".encode("utf-8")),
+        last_modified=payload.last_modified,
+    )
+
+    with _projection_lock:
+        _projection_cache[key] = projected
+        while len(_projection_cache) > PROJECTION_CACHE_SIZE:
+            _projection_cache.popitem(last=False)
+    return projected
+
+def load_article_index():
+    """Map article id -> article across all data files; weekly files (with summaries) win."""
+    manifest = load_manifest()
+    cached = _article_index_cache.get("index")
+    if cache_lookup("article_index", cached and cached[0] is manifest):
+        return cached[1]
+
+    paths = []
+    if "all" in manifest["weeks"]:
+        paths.append((os.path.join(DATA_DIR, manifest['weeks']['all']['file']), None))
+    for entry in sorted(list_weeks(), key=lambda entry: entry["week"]):
+        paths.append((os.path.join(DATA_DIR, entry['file']), entry["week"]))
+
+    index = {}
+    for path, week in paths:
+        for article in load_file_payload(path, week).data.get("articles", []):
+            if article.get("id"):
+                index[article["id"]] = article
+    _article_index_cache["index"] = (manifest, index)
+    return index
+
+# ----------------------
+# Hot reload
+# ----------------------
+def reload_index(generation):
+    """Swap in freshly opened search indexes and drop every cache derived from the data files."""
+    global vector_store, lexical_index
+    # Opened before the swap, so in-flight searches finish on the old stores
+    vector_store, lexical_index = reload_stores()
+    forget_manifest()
+    _news_cache.clear()
+    _weeks_cache.clear()
+    _article_index_cache.clear()
+    with _projection_lock:
+        _projection_cache.clear()
+    with _search_lock:
+        _search_cache.clear()
+
+index_watcher = GenerationWatcher(GENERATION_FILE, read_generation, reload_index)
 
 # ----------------------
 # Search articles
 # ----------------------
-def search_articles(query, week_filter=None, limit=10):
+SEARCH_MODES = ("lexical", "vector", "hybrid")
+SEARCH_DEFAULT_MODE = os.environ.get("SEARCH_DEFAULT_MODE", "hybrid")
+# Vector hits fetched per requested result when articles are indexed as several chunks
+VECTOR_CHUNK_OVERSAMPLE = int(os.environ.get("VECTOR_CHUNK_OVERSAMPLE", "8"))
+SEARCH_CACHE_SIZE = int(os.environ.get("SEARCH_CACHE_SIZE", "1024"))
+
+# Result lists by (query, week, limit, mode, index generation); new documents change the key
+_search_cache = OrderedDict()
+_search_lock = threading.Lock()
+
+def _search_key(query, week_filter, limit, mode):
+    return (" ".join(query.split()), week_filter or "all", limit, mode or SEARCH_DEFAULT_MODE, index_watcher.generation)
+
+def _cached_results(key):
+    with _search_lock:
+        results = _search_cache.get(key)
+        if results is not None:
+            _search_cache.move_to_end(key)
+        return results
+
+def cached_search(query, week_filter=None, limit=10, mode=None):
+    """Results of an identical earlier search while they are still cached, else None; never searches."""
+    index_watcher.check()
+    results = _cached_results(_search_key(query, week_filter, limit, mode))
+    if results is not None:
+        cache_lookup("search", True)
+    return results
+
+def search_articles(query, week_filter=None, limit=10, mode=None):
+    """Search articles; results are cached per index generation, and identical concurrent
+    searches are embedded and queried once.
+
+    mode is "lexical" (BM25 only, no embedding), "vector" or "hybrid" (both, fused with RRF).
+    The returned list is shared between requests; treat it as read-only.
+    """
+    # Also called from the ASGI routes, which skip Flask's request hooks
+    index_watcher.check()
+    mode = mode or SEARCH_DEFAULT_MODE
+    key = _search_key(query, week_filter, limit, mode)
+    results = _cached_results(key)
+    if cache_lookup("search", results is not None):
+        return results
+
+    results, complete = search_flight.do(key, _search_articles, query, week_filter, limit, mode)
+    # Partial results (a backend failed) are served but not cached
+    if complete:
+        with _search_lock:
+            _search_cache[key] = results
+            while len(_search_cache) > SEARCH_CACHE_SIZE:
+                _search_cache.popitem(last=False)
+    return results
+
+def _search_articles(query, week_filter=None, limit=10, mode="hybrid"):
+    """Returns (results, complete); complete is False if a backend failed."""
+    if mode == "lexical":
+        results = _lexical_search(query, week_filter, limit)
+        return results or [], results is not None
+    if mode == "vector" or not len(lexical_index):
+        results = _vector_search(query, week_filter, limit)
+        return results or [], results is not None
+
+    vector_results = _vector_search(query, week_filter, limit)
+    lexical_results = _lexical_search(query, week_filter, limit)
+    complete = vector_results is not None and lexical_results is not None
+    vector_results, lexical_results = vector_results or [], lexical_results or []
+    by_link = {r["link"]: dict(r) for r in lexical_results}
+    # A vector hit adds its cosine confidence; an article only BM25 found keeps confidence None
+    for r in vector_results:
+        by_link.setdefault(r["link"], {}).update(r)
+
+    fused = reciprocal_rank_fusion([
+        [r["link"] for r in vector_results],
+        [r["link"] for r in lexical_results],
+    ])
+    results = []
+    for link, score in fused[:limit]:
+        result = by_link[link]
+        result["score"] = round(score, 5)
+        results.append(result)
+    return results, complete
+
+def _lexical_search(query, week_filter=None, limit=10):
+    try:
+        with stage_timer("lexical_query"):
+            hits = lexical_index.search(query, k=limit, week_filter=week_filter)
+        if not hits:
+            return []
+        # BM25 scores are unbounded; report them relative to the best hit. They are not
+        # similarities, so `confidence` (cosine-based, from vector search) stays empty
+        top_score = hits[0][1]
+        return [{
+            "title": doc["title"] or "Unknown",
+            "summary": doc["summary"] or "Unknown",
+            "link": doc["link"],
+            "confidence": None,
+            "lexical_score": round(score / top_score, 3)
+        } for doc, score in hits]
+    except Exception as e:
+        print(f"Error searching lexical index: {e}")
+        return None
+
+def _vector_search(query, week_filter=None, limit=10):
     try:
         if not vector_store:
             return []
 
-        docs_scores = vector_store.similarity_search_with_score(query, k=limit*2)
+        # Full-content chunks mean several hits per article, so fetch more to fill `limit` articles
+        oversample = VECTOR_CHUNK_OVERSAMPLE if EMBED_FULL_CONTENT else 2
+        with stage_timer("embed"):
+            query_vector = embeddings.embed_query(query)
+        with stage_timer("vector_query"):
+            docs_scores = vector_store.similarity_search_by_vector_with_score(
+                query_vector, k=limit*oversample, week_filter=week_filter
+            )
         threshold = 0.01
         filtered_results = []
 
         unique_links = set()  # Track links we've already added
 
+        # Results come best first, so the first hit for an article is its best-scoring chunk
         for doc, score in docs_scores:
             confidence = distance_to_confidence(score)
             if confidence < threshold:
                 continue
 
             try:
-                parts = {}
-                for item in doc.page_content.split(" | "):
-                    if ": " in item:
-                        key, value = item.split(": ", 1)
-                        parts[key] = value
+                parts = doc.metadata
+                if "summary" not in parts:
+                    # Documents indexed before chunking only carry the summary in page_content
+                    parts = dict(parts)
+                    for item in doc.page_content.split(" | "):
+                        if ": " in item:
+                            key, value = item.split(": ", 1)
+                            parts.setdefault(key, value)
 
                 link = parts.get("link", "#")
 
@@ -149,7 +414,41 @@ def search_articles(query, week_filter=None, limit=10):
 
     except Exception as e:
         print(f"Error searching articles: {e}")
-        return []
+        return None
+
+# ----------------------
+# Chat context
+# ----------------------
+def build_chat_context(message):
+    """Build the LLM context for a chat message from the latest week's news (and search if asked)."""
+    # --- Step 1: Detect if user wants article info ---
+    search_keywords = ["search", "find", "show articles", "get articles", "latest news"]
+    wants_search = any(word in message.lower() for word in search_keywords)
+
+    # --- Step 2: Load latest week's news JSON for context ---
+    latest_week_tag = get_week_tag()
+    news_data = load_news_data(week_tag=latest_week_tag)
+    context_text = ""
+    if news_data.get("articles"):
+        context_text = f"Here are the AI news articles for week {latest_week_tag}:\n\n"
+        for article in news_data["articles"]:
+            context_text += f"Title: {article['title']}\nLink: {article['link']}\nSummary: {article.get('summary', '')}\n\n"
+
+    # --- Step 3: If user explicitly wants search, filter by query ---
+    if wants_search and (vector_store or len(lexical_index)):
+        search_results = search_articles(query=message, week_filter=latest_week_tag, limit=5)
+        if search_results:
+            context_text = f"Based on the latest AI news (week {latest_week_tag}), here are some relevant articles:\n\n"
+            for article in search_results:
+                context_text += f"Title: {article['title']}\nLink: {article['link']}\nSummary: {article['summary']}\n\n"
+        else:
+            context_text = f"I looked at the latest AI news (week {latest_week_tag}) but couldn't find any articles matching your query.\n\n"
+
+    # --- Step 4: Include a note in general response ---
+    if not wants_search:
+        context_text += f"Note: The AI news articles referenced here are from the latest week ({latest_week_tag}).\n\n"
+
+    return context_text
 
 # ----------------------
 # Routes
@@ -163,13 +462,38 @@ def index():
 @app.route('/api/news')
 def api_news():
     week_tag = request.args.get('week', None)
-    news_data = load_news_data(week_tag)
-    return jsonify(news_data)
+    fields = parse_fields(request.args.get('fields'), request.args.get('view'))
+    offset = request.args.get('offset', 0, type=int)
+    limit = request.args.get('limit', None, type=int)
+
+    if offset < 0 or (limit is not None and limit < 1):
+        return jsonify({"error": "offset must be >= 0 and limit >= 1", "success": False}), 400
+    if limit is not None:
+        limit = min(limit, MAX_PAGE_SIZE)
+
+    try:
+        payload = load_news_payload(week_tag)
+    except Exception as e:
+        print(f"Error loading news data: {e}")
+        return jsonify({"articles": [], "week": "Unknown"})
+
+    if fields or offset or limit is not None:
+        payload = project_payload(payload, fields, offset, limit)
+    return cached_json_response(payload, max_age=NEWS_CACHE_MAX_AGE)
+
+@app.route('/api/article/<article_id>')
+def api_article(article_id):
+    try:
+        article = load_article_index().get(article_id)
+    except Exception as e:
+        return jsonify({"error": str(e), "success": False}), 500
+    if article is None:
+        return jsonify({"error": "Article not found", "success": False}), 404
+    return jsonify({"article": article, "success": True})
 
 @app.route('/api/weeks')
 def api_weeks():
-    weeks = get_available_weeks()
-    return jsonify(weeks)
+    return cached_json_response(load_weeks_payload(), max_age=NEWS_CACHE_MAX_AGE)
 
 @app.route('/api/search', methods=['POST'])
 def api_search():
@@ -178,16 +502,20 @@ def api_search():
         query = data.get('query', '').strip()
         week_filter = data.get('week_filter', 'all')
         limit = data.get('limit', 10)
+        mode = data.get('mode', SEARCH_DEFAULT_MODE)
 
         if not query:
             return jsonify({"error": "Query is required", "success": False}), 400
+        if mode not in SEARCH_MODES:
+            return jsonify({"error": f"mode must be one of {', '.join(SEARCH_MODES)}", "success": False}), 400
 
-        results = search_articles(query, week_filter, limit)
+        results = search_articles(query, week_filter, limit, mode)
 
         return jsonify({
             "results": results,
             "query": query,
             "week_filter": week_filter,
+            "mode": mode,
             "total_results": len(results),
             "success": True
         })
@@ -197,11 +525,28 @@ def api_search():
 @app.route('/api/summary', methods=['GET'])
 def api_summary():
     try:
-        summary = generate_weekly_summary()
+        with stage_timer("llm"):
+            summary = summary_flight.do("weekly", generate_weekly_summary)
         return jsonify({"summary": summary, "success": True})
     except Exception as e:
         return jsonify({"error": str(e), "success": False}), 500
 
+@app.route('/api/summary/jobs', methods=['POST'])
+def api_summary_job():
+    try:
+        job_id = jobs.submit("summary:weekly", summary_flight.do, "weekly", generate_weekly_summary)
+        return jsonify({"job_id": job_id, "success": True}), 202
+    except Exception as e:
+        return jsonify({"error": str(e), "success": False}), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def api_job(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job", "success": False}), 404
+    job["success"] = job["status"] != "failed"
+    return jsonify(job)
+
 @app.route('/api/chat', methods=['POST'])
 def api_chat():
     try:
@@ -212,43 +557,19 @@ def api_chat():
         if not message:
             return jsonify({"error": "No message provided"}), 400
 
-        # --- Step 1: Detect if user wants article info ---
-        search_keywords = ["search", "find", "show articles", "get articles", "latest news"]
-        wants_search = any(word in message.lower() for word in search_keywords)
-
-        # --- Step 2: Load latest week's news JSON for context ---
-        latest_week_tag = get_week_tag()
-        news_data = load_news_data(week_tag=latest_week_tag)
-        context_text = ""
-        if news_data.get("articles"):
-            context_text = f"Here are the AI news articles for week {latest_week_tag}:\n\n"
-            for article in news_data["articles"]:
-                context_text += f"Title: {article['title']}\nLink: {article['link']}\nSummary: {article.get('summary', '')}\n\n"
-
-        # --- Step 3: If user explicitly wants search, filter by query ---
-        if wants_search and vector_store:
-            search_results = search_articles(query=message, week_filter=latest_week_tag, limit=5)
-            if search_results:
-                context_text = f"Based on the latest AI news (week {latest_week_tag}), here are some relevant articles:\n\n"
-                for article in search_results:
-                    context_text += f"Title: {article['title']}\nLink: {article['link']}\nSummary: {article['summary']}\n\n"
-            else:
-                context_text = f"I looked at the latest AI news (week {latest_week_tag}) but couldn't find any articles matching your query.\n\n"
-
-        # --- Step 4: Include a note in general response ---
-        if not wants_search:
-            context_text += f"Note: The AI news articles referenced here are from the latest week ({latest_week_tag}).\n\n"
-
-        # --- Step 5: Call the LLM chain ---
+        context_text = build_chat_context(message)
+
+        # Call the LLM chain
         llm_input = {
             "input": message,
             "context": context_text
         }
 
-        response = chain_with_history.invoke(
-            llm_input,
-            {"configurable": {"session_id": session_id}}
-        )
+        with stage_timer("llm"):
+            response = chain_with_history.invoke(
+                llm_input,
+                {"configurable": {"session_id": session_id}}
+            )
 
         # Safe handling
         if hasattr(response, "content"):
@@ -267,6 +588,84 @@ def api_chat():
         print(traceback.format_exc())
         return jsonify({"error": str(e), "success": False}), 500
 
+# ----------------------
+# Metrics
+# ----------------------
+registry.gauge("vector_store_documents", "Documents (summaries and content chunks) in the vector store.",
+               lambda: vector_store.count() if vector_store else None)
+registry.gauge("lexical_index_documents", "Articles in the BM25 index.", lambda: len(lexical_index))
+registry.gauge("search_cache_entries", "Search result lists held in the search cache.", lambda: len(_search_cache))
+registry.gauge("index_generation", "Index generation this worker has loaded.", lambda: index_watcher.generation)
+registry.gauge("index_reloads_total", "Hot reloads of the data and search indexes.",
+               lambda: index_watcher.reloads, kind="counter")
+registry.gauge("llm_calls_total", "LLM calls made through the gateway.",
+               lambda: get_llm_metrics()["calls"], kind="counter")
+registry.gauge("llm_errors_total", "LLM calls that failed after retries.",
+               lambda: get_llm_metrics()["errors"], kind="counter")
+registry.gauge("llm_retries_total", "LLM call retries.", lambda: get_llm_metrics()["retries"], kind="counter")
+def _llm_tokens():
+    snapshot = get_llm_metrics()
+    return {("prompt",): snapshot["prompt_tokens"], ("completion",): snapshot["completion_tokens"]}
+
+registry.gauge("llm_tokens_total", "LLM tokens used, by type.", _llm_tokens, labelnames=("type",), kind="counter")
+scheduler_gauges(llm_scheduler.snapshot)
+
+@app.before_request
+def _start_timer():
+    g.request_start = time.perf_counter()
+    index_watcher.check()
+    # Reading profiles sends the token header too; don't profile that
+    if profiling.ENABLED and not request.path.startswith("/api/profiles") and profiling.should_profile(request.headers):
+        g.profile = profiling.start()
+
+@app.after_request
+def _record_latency(response):
+    # The URL rule, not the path, so /api/article/<article_id> is one series
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    session = g.pop("profile", None)
+    if session is not None:
+        trigger = "header" if request.headers.get(profiling.PROFILE_HEADER) else "sample"
+        profile_id = profiling.finish(session, request.method, route, request.path, response.status_code, trigger)
+        response.headers["X-Profile-Id"] = profile_id
+    start = g.pop("request_start", None)
+    if start is not None:
+        request_latency.observe(time.perf_counter() - start, method=request.method, route=route,
+                                status=response.status_code)
+    return response
+
+@app.route('/metrics')
+def metrics():
+    return Response(registry.render(), content_type=CONTENT_TYPE)
+
+# ----------------------
+# Profiles
+# ----------------------
+def _profiles_denied():
+    """Error response unless the request carries PROFILE_TOKEN; sampling alone never opens the profiles."""
+    if not profiling.ENABLED:
+        return jsonify({"error": "Profiling is disabled", "success": False}), 404
+    if not profiling.has_token(request.headers):
+        return jsonify({"error": "Reading profiles requires PROFILE_TOKEN", "success": False}), 403
+    return None
+
+@app.route('/api/profiles')
+def api_profiles():
+    denied = _profiles_denied()
+    if denied:
+        return denied
+    limit = min(request.args.get('limit', 50, type=int), 500)
+    return jsonify({"profiles": profiling.list_profiles(limit), "success": True})
+
+@app.route('/api/profiles/<profile_id>')
+def api_profile(profile_id):
+    denied = _profiles_denied()
+    if denied:
+        return denied
+    profile = profiling.load_profile(profile_id)
+    if profile is None:
+        return jsonify({"error": "Unknown profile", "success": False}), 404
+    return jsonify({"profile": profile, "success": True})
+
 # ---------------------- 
 # Run server
 # ----------------------
@@ -0,0 +1,135 @@
+"""
+ASGI entrypoint for serving many concurrent chat users on a few processes.
+
+The LLM-bound routes (/api/chat, /api/summary) are native coroutines that
+await the model, so a waiting request holds no thread. Embedding search runs
+on a bounded thread pool, and every other route is served by the regular
+Flask app through a2wsgi, which runs it on its own thread pool (WSGI_THREADS)
+and streams the responses.
+
+Run with:
+    uvicorn asgi:app --host 0.0.0.0 --port 5111 --workers 4
+"""
+import os
+import uuid
+import asyncio
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+
+from app import app as flask_app, build_chat_context, cached_search, search_articles, SEARCH_DEFAULT_MODE, SEARCH_MODES
+from agents.chat_bot.chat import chain_with_history
+from agents.reporter.report_bot import agenerate_weekly_summary
+from web.jobs import AsyncSingleFlight
+from web.metrics import stage_timer, track_route
+from web.profiling import profile_route
+
+SEARCH_THREADS = int(os.environ.get("SEARCH_THREADS", "4"))
+WSGI_THREADS = int(os.environ.get("WSGI_THREADS", "8"))
+
+# Embedding + vector search is CPU-bound; keep it off the event loop and bounded
+search_executor = ThreadPoolExecutor(max_workers=SEARCH_THREADS, thread_name_prefix="search")
+
+summary_flight = AsyncSingleFlight()
+
+async def run_in_search_pool(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(search_executor, func, *args)
+
+# ----------------------
+# Async routes
+# ----------------------
+@track_route('/api/search', 'POST')
+@profile_route('/api/search')
+async def api_search(request):
+    try:
+        data = await request.json()
+        query = data.get('query', '').strip()
+        week_filter = data.get('week_filter', 'all')
+        limit = data.get('limit', 10)
+        mode = data.get('mode', SEARCH_DEFAULT_MODE)
+
+        if not query:
+            return JSONResponse({"error": "Query is required", "success": False}, status_code=400)
+        if mode not in SEARCH_MODES:
+            return JSONResponse({"error": f"mode must be one of {', '.join(SEARCH_MODES)}", "success": False}, status_code=400)
+
+        # Lexical search is microseconds of pure Python and cached results need no work;
+        # only embedding searches go to the pool
+        if mode == "lexical":
+            results = search_articles(query, week_filter, limit, mode)
+        else:
+            results = cached_search(query, week_filter, limit, mode)
+            if results is None:
+                results = await run_in_search_pool(search_articles, query, week_filter, limit, mode)
+
+        return JSONResponse({
+            "results": results,
+            "query": query,
+            "week_filter": week_filter,
+            "mode": mode,
+            "total_results": len(results),
+            "success": True
+        })
+    except Exception as e:
+        return JSONResponse({"error": str(e), "success": False}, status_code=500)
+
+@track_route('/api/summary')
+@profile_route('/api/summary')
+async def api_summary(request):
+    try:
+        with stage_timer("llm"):
+            summary = await summary_flight.do("weekly", agenerate_weekly_summary)
+        return JSONResponse({"summary": summary, "success": True})
+    except Exception as e:
+        return JSONResponse({"error": str(e), "success": False}, status_code=500)
+
+@track_route('/api/chat', 'POST')
+@profile_route('/api/chat')
+async def api_chat(request):
+    try:
+        data = await request.json()
+        message = data.get('message', '').strip()
+        session_id = data.get('session_id', str(uuid.uuid4()))
+
+        if not message:
+            return JSONResponse({"error": "No message provided"}, status_code=400)
+
+        context_text = await run_in_search_pool(build_chat_context, message)
+
+        with stage_timer("llm"):
+            response = await chain_with_history.ainvoke(
+                {"input": message, "context": context_text},
+                {"configurable": {"session_id": session_id}}
+            )
+
+        # Safe handling
+        if hasattr(response, "content"):
+            reply_text = response.content
+        else:
+            reply_text = str(response)
+
+        return JSONResponse({
+            "response": reply_text,
+            "session_id": session_id,
+            "success": True
+        })
+
+    except Exception as e:
+        print(traceback.format_exc())
+        return JSONResponse({"error": str(e), "success": False}, status_code=500)
+
+# ----------------------
+# App
+# ----------------------
+app = Starlette(routes=[
+    Route('/api/search', api_search, methods=['POST']),
+    Route('/api/summary', api_summary, methods=['GET']),
+    Route('/api/chat', api_chat, methods=['POST']),
+    # Cheap routes (/, /api/news, /api/weeks, static files) stay on Flask
+    Mount('/', app=WSGIMiddleware(flask_app, workers=WSGI_THREADS)),
+])
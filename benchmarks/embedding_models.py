@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Compare embedding models (and inference backends) on our own articles.
+
+For each candidate, every article in data/*.json is chunked exactly as the
+indexer does it, encoded, and stored in a temporary NumPy index. The labeled
+queries in benchmarks/queries.json are then run against it, with chunk hits
+aggregated to one result per article as in the app's search.
+
+The JSON report has, per candidate: encode throughput, query latency p50/p99
+(embedding + search), index size on disk, recall@k and MRR. recall@k only
+separates models when k is well below the number of articles indexed (a
+retriever that returns every article scores 1.0), so k defaults to 1 and
+must be smaller than the article count.
+
+Usage:
+    python3 benchmarks/embedding_models.py
+    python3 benchmarks/embedding_models.py --models sentence-transformers/all-MiniLM-L6-v2 --backends torch,onnx
+    python3 benchmarks/embedding_models.py --k 3 --output report.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rag.embedders import create_embeddings
+from rag.indexing import DATA_DIR, iter_data_files, iter_articles, new_documents
+from rag.numpy_index import NumpyVectorIndex
+
+DEFAULT_MODELS = "sentence-transformers/all-mpnet-base-v2,sentence-transformers/all-MiniLM-L6-v2"
+QUERIES_FILE = Path(__file__).resolve().parent / "queries.json"
+
+def load_documents(data_dir):
+    """Summary + content-chunk documents for every article, deduplicated by link like the indexer."""
+    summary_links, chunked_links = set(), set()
+    documents = []
+    for path, week in iter_data_files(data_dir):
+        articles = (article for _, article in iter_articles(path, week))
+        documents.extend(doc for _, doc in new_documents(articles, summary_links, chunked_links))
+    return documents
+
+def rank_links(index, vector, k, oversample=8):
+    """Article links for a query vector, best chunk per article first."""
+    links = []
+    for record, _ in index.search(vector, k * oversample):
+        if record["link"] not in links:
+            links.append(record["link"])
+            if len(links) == k:
+                break
+    return links
+
+def evaluate(model_name, backend, documents, queries, k, repeat):
+    embeddings = create_embeddings(model_name, backend)
+    embeddings.embed_query("warm up")
+
+    start = time.perf_counter()
+    vectors = np.asarray(embeddings.embed_documents([doc.page_content for doc in documents]), dtype=np.float32)
+    encode_seconds = time.perf_counter() - start
+
+    directory = tempfile.mkdtemp(prefix="embed-bench-")
+    try:
+        index = NumpyVectorIndex(directory)
+        index.add(vectors, [dict(doc.metadata) for doc in documents])
+        index_bytes = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+        latencies = []
+        recalls = []
+        reciprocal_ranks = []
+        for item in queries:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                links = rank_links(index, embeddings.embed_query(item["query"]), k)
+                latencies.append(time.perf_counter() - start)
+            relevant = set(item["relevant"])
+            recalls.append(len(relevant & set(links)) / len(relevant))
+            rank = next((i for i, link in enumerate(links, start=1) if link in relevant), None)
+            reciprocal_ranks.append(1 / rank if rank else 0.0)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return {
+        "model": model_name,
+        "backend": backend,
+        "dim": int(vectors.shape[1]),
+        "documents": len(documents),
+        "encode_docs_per_sec": round(len(documents) / encode_seconds, 2),
+        "query_p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3),
+        "query_p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 3),
+        "index_bytes": index_bytes,
+        f"recall@{k}": round(float(np.mean(recalls)), 4),
+        "mrr": round(float(np.mean(reciprocal_ranks)), 4),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", default=DEFAULT_MODELS, help="Comma-separated model names or local paths")
+    parser.add_argument("--backends", default="torch", help="Comma-separated EMBEDDING_BACKEND values to try per model")
+    parser.add_argument("--queries", default=str(QUERIES_FILE), help="Labeled query set (JSON)")
+    parser.add_argument("--data-dir", default=str(DATA_DIR))
+    parser.add_argument("--k", type=int, default=1, help="Results per query for recall@k (below the article count)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per query")
+    parser.add_argument("--output", help="Write the JSON report here as well as stdout")
+    args = parser.parse_args()
+
+    with open(args.queries, "r", encoding="utf-8") as f:
+        queries = json.load(f)["queries"]
+    documents = load_documents(args.data_dir)
+    article_count = len({doc.metadata["link"] for doc in documents})
+    print(f"{len(documents)} documents ({article_count} articles), {len(queries)} queries", file=sys.stderr)
+    if args.k >= article_count:
+        sys.exit(f"--k {args.k} returns every article, so recall@{args.k} is 1.0 for any model; "
+                 f"use a k below {article_count} or add articles and labeled queries")
+
+    report = {"k": args.k, "queries": len(queries), "results": []}
+    for model_name in args.models.split(","):
+        for backend in args.backends.split(","):
+            print(f"Evaluating {model_name} ({backend})", file=sys.stderr)
+            report["results"].append(evaluate(model_name.strip(), backend.strip(), documents, queries, args.k, args.repeat))
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+if __name__ == "__main__":
+    main()
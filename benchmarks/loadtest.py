@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end load test for the web app.
+
+Generates a synthetic dataset, starts the app against it with the fake chat
+model (LLM_PROVIDER=fake) and fake embeddings (EMBEDDING_BACKEND=fake), so no
+API key or model download is needed, then drives a weighted mix of requests
+to /, /api/news, /api/search, /api/chat and /api/summary from concurrent
+clients. Reports requests/sec and latency percentiles per endpoint as JSON.
+
+Usage:
+    python3 benchmarks/loadtest.py                                  # defaults: 30s, 16 clients
+    python3 benchmarks/loadtest.py --weeks 52 --articles-per-week 200 --duration 60
+    python3 benchmarks/loadtest.py --mix news=60,search=30,chat=10 --clients 32
+    python3 benchmarks/loadtest.py --server "uvicorn asgi:app --port {port} --workers 2"
+    python3 benchmarks/loadtest.py --url http://staging:5111 --duration 10   # existing server, no fakes
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import signal
+import argparse
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from datetime import datetime, timedelta
+
+import numpy as np
+import requests
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_SERVER = "gunicorn --workers 2 --threads 8 --bind 127.0.0.1:{port} app:app"
+DEFAULT_MIX = "index=5,news=40,search=30,chat=15,summary=10"
+# chat.py and report_bot.py read this week's file at import time
+FIXED_WEEK = "2025-W36"
+
+WORDS = """
+model data research learning neural network researchers system results training language
+vision robot health energy climate chip design approach method study performance accuracy
+efficient scale benchmark dataset inference reasoning protein drug battery material sensor
+fusion quantum graph agent planning memory privacy fairness vaccine protein molecule
+""".split()
+
+# ----------------------
+# Synthetic dataset
+# ----------------------
+def _week_tags(count):
+    """The fixed week, the current week, then earlier weeks; newest first, no duplicates."""
+    tags = []
+    day = datetime.now()
+    while len(tags) < count - 1:
+        year, week, _ = day.isocalendar()
+        tag = f"{year}-W{week:02d}"
+        if tag not in tags and tag != FIXED_WEEK:
+            tags.append(tag)
+        day -= timedelta(days=7)
+    return tags + [FIXED_WEEK]
+
+def _article(rng, week, index, content_words):
+    words = lambda n: " ".join(rng.choice(WORDS) for _ in range(n))
+    title = words(8).capitalize()
+    return {
+        "id": f"{week}-{index:05d}",
+        "title": title,
+        "link": f"https://example.com/{week}/{index}",
+        "date": datetime.now().strftime("%a, %d %b %Y %H:%M:%S +0000"),
+        "content": words(content_words),
+        "summary": words(40).capitalize() + ".",
+        "week": week,
+    }
+
+def make_dataset(directory, weeks, articles_per_week, content_words, seed=0):
+    """Write week-*.json files and the general mit_ai_news.json into directory."""
+    rng = random.Random(seed)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    everything = []
+    for week in _week_tags(weeks):
+        articles = [_article(rng, week, i, content_words) for i in range(articles_per_week)]
+        everything.extend(articles)
+        with open(directory / f"week-{week}.json", "w", encoding="utf-8") as f:
+            json.dump({"week": week, "articles": articles}, f)
+    # The raw feed dump has no summaries
+    feed = [{key: value for key, value in article.items() if key != "summary"} for article in everything]
+    with open(directory / "mit_ai_news.json", "w", encoding="utf-8") as f:
+        json.dump(feed, f)
+    return len(everything)
+
+# ----------------------
+# Server
+# ----------------------
+def offline_env(data_dir, work_dir, llm_latency):
+    """Environment that points the app at the synthetic data, fake models and a scratch index."""
+    return dict(
+        os.environ,
+        NEWS_DATA_DIR=str(data_dir),
+        LLM_PROVIDER="fake",
+        LLM_FAKE_LATENCY=str(llm_latency),
+        EMBEDDING_BACKEND="fake",
+        VECTOR_BACKEND="numpy",
+        NUMPY_INDEX_DIR=str(work_dir / "numpy_index"),
+        LEXICAL_INDEX_PATH=str(work_dir / "bm25_index.json"),
+        INDEX_CHECKPOINT_PATH=str(work_dir / "index_checkpoint.json"),
+        LLM_BUCKET_PATH=str(work_dir / "llm_bucket.sqlite3"),
+    )
+
+def build_index(env, work_dir):
+    """Index the dataset before starting the server (workers only read the index)."""
+    with open(work_dir / "index.log", "w") as log:
+        subprocess.run([sys.executable, "init_vector_store.py"], cwd=PROJECT_ROOT, env=env,
+                       stdout=log, stderr=subprocess.STDOUT, check=True)
+
+def start_server(command, port, env, work_dir):
+    log = open(work_dir / "server.log", "w")
+    process = subprocess.Popen(
+        command.format(port=port).split(),
+        cwd=PROJECT_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT, start_new_session=True,
+    )
+    return process, log
+
+def wait_until_ready(url, process, timeout=300):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError("server exited during startup (see server.log)")
+        try:
+            if requests.get(url + "/", timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"server not ready after {timeout}s")
+
+def stop_server(process):
+    # gunicorn/uvicorn workers share the session; stop them all
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=30)
+    except ProcessLookupError:
+        pass
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+
+# ----------------------
+# Traffic
+# ----------------------
+def _requests_for(week_tags):
+    """Request factories by endpoint name; each takes a Random and returns (method, path, json body)."""
+    def query(rng):
+        return " ".join(rng.sample(WORDS, rng.randint(1, 4)))
+    return {
+        "index": lambda rng: ("GET", "/", None),
+        "news": lambda rng: ("GET", f"/api/news?view=list&week={rng.choice(week_tags)}", None),
+        "search": lambda rng: ("POST", "/api/search", {
+            "query": query(rng),
+            "week_filter": rng.choice(["all"] + week_tags),
+            "limit": 10,
+        }),
+        "chat": lambda rng: ("POST", "/api/chat", {
+            "message": rng.choice(["search ", "find ", "", "what about "]) + query(rng),
+            # A bounded set of sessions, so server-side chat history doesn't grow without limit
+            "session_id": f"load-{rng.randint(0, 49)}",
+        }),
+        "summary": lambda rng: ("GET", "/api/summary", None),
+    }
+
+def parse_mix(mix):
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+def run_clients(url, weights, clients, duration, week_tags, seed=0):
+    factories = _requests_for(week_tags)
+    unknown = set(weights) - set(factories)
+    if unknown:
+        raise ValueError(f"Unknown endpoints in --mix: {sorted(unknown)} (choose from {sorted(factories)})")
+    names = list(weights)
+    results = []  # (endpoint, ok, latency seconds)
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(client_id):
+        rng = random.Random(seed * 1000 + client_id)
+        session = requests.Session()
+        local = []
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights=[weights[n] for n in names])[0]
+            method, path, body = factories[name](rng)
+            start = time.perf_counter()
+            try:
+                response = session.request(method, url + path, json=body, timeout=120)
+                ok = response.status_code < 400
+            except requests.RequestException:
+                ok = False
+            local.append((name, ok, time.perf_counter() - start))
+        with lock:
+            results.extend(local)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - started
+
+def summarize(results, elapsed):
+    def stats(rows):
+        latencies = np.array([latency for _, _, latency in rows]) * 1000
+        return {
+            "requests": len(rows),
+            "errors": sum(1 for _, ok, _ in rows if not ok),
+            "rps": round(len(rows) / elapsed, 2),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+            "p90_ms": round(float(np.percentile(latencies, 90)), 2),
+            "p99_ms": round(float(np.percentile(latencies, 99)), 2),
+            "max_ms": round(float(latencies.max()), 2),
+        }
+    report = {"elapsed_s": round(elapsed, 2), "total": stats(results) if results else {}, "endpoints": {}}
+    for name in sorted({name for name, _, _ in results}):
+        report["endpoints"][name] = stats([row for row in results if row[0] == name])
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Load an already-running server instead of starting one")
+    parser.add_argument("--server", default=DEFAULT_SERVER, help="Server command; {port} is substituted")
+    parser.add_argument("--port", type=int, default=5199)
+    parser.add_argument("--data-dir", help="Keep the synthetic dataset here (default: a temp dir)")
+    parser.add_argument("--weeks", type=int, default=12)
+    parser.add_argument("--articles-per-week", type=int, default=50)
+    parser.add_argument("--content-words", type=int, default=600)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Fake LLM response time (seconds)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Endpoint weights, e.g. news=40,search=30")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of measured traffic")
+    parser.add_argument("--warmup", type=float, default=5, help="Seconds of unmeasured traffic first")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report here as well as stdout")
+    args = parser.parse_args()
+
+    weights = parse_mix(args.mix)
+    week_tags = _week_tags(args.weeks)
+    process = log = None
+    report = None
+    work_dir = Path(tempfile.mkdtemp(prefix="loadtest-"))
+    try:
+        url = args.url
+        if url is None:
+            data_dir = Path(args.data_dir) if args.data_dir else work_dir / "data"
+            count = make_dataset(data_dir, args.weeks, args.articles_per_week, args.content_words, args.seed)
+            print(f"Synthetic dataset: {count} articles in {args.weeks} weeks ({data_dir})", file=sys.stderr)
+            env = offline_env(data_dir.resolve(), work_dir, args.llm_latency)
+            build_index(env, work_dir)
+            process, log = start_server(args.server, args.port, env, work_dir)
+            url = f"http://127.0.0.1:{args.port}"
+        url = url.rstrip("/")
+        wait_until_ready(url, process)
+
+        if args.warmup:
+            run_clients(url, weights, args.clients, args.warmup, week_tags, args.seed + 1)
+        results, elapsed = run_clients(url, weights, args.clients, args.duration, week_tags, args.seed)
+        report = summarize(results, elapsed)
+        report["config"] = {
+            "clients": args.clients, "duration_s": args.duration, "mix": weights,
+            "weeks": args.weeks, "articles_per_week": args.articles_per_week,
+            "llm_latency_s": args.llm_latency, "server": None if args.url else args.server,
+        }
+    finally:
+        if process is not None:
+            stop_server(process)
+            log.close()
+        if report is None:
+            print(f"Load test failed; logs kept in {work_dir}", file=sys.stderr)
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+if __name__ == "__main__":
+    main()
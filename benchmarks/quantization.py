@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark quantized first-stage search against the exact float32 index.
+
+Reports, for each quantization mode, the bytes scanned per query, query
+latency (p50/p99) and recall@k against exact float32 top-k.
+
+Usage:
+    python3 benchmarks/quantization.py                      # synthetic vectors
+    python3 benchmarks/quantization.py --index ./numpy_index  # an existing NumPy index
+    python3 benchmarks/quantization.py --n 50000 --k 10 --output report.json
+"""
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rag.numpy_index import NumpyVectorIndex, QUANTIZATIONS
+
+def synthetic_index(directory, n, dim, seed=0):
+    """Build a clustered synthetic index (closer to real embeddings than uniform noise)."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, n // 50), dim)).astype(np.float32)
+    assignments = rng.integers(0, len(centers), size=n)
+    vectors = centers[assignments] + 0.5 * rng.standard_normal((n, dim)).astype(np.float32)
+    records = [{"link": f"doc-{i}", "week": f"W{i % 52:02d}"} for i in range(n)]
+    index = NumpyVectorIndex(directory)
+    index.add(vectors, records)
+
+def make_queries(directory, count, seed=1):
+    """Perturbed copies of stored vectors, so every query has real near neighbours."""
+    rng = np.random.default_rng(seed)
+    matrix = NumpyVectorIndex(directory)._snapshot.matrix
+    rows = rng.integers(0, len(matrix), size=count)
+    return np.asarray(matrix[rows]) + 0.05 * rng.standard_normal((count, matrix.shape[1])).astype(np.float32)
+
+def run(directory, queries, k, rerank_factor):
+    exact_index = NumpyVectorIndex(directory)
+    truth = [{r["link"] for r, _ in exact_index.search(q, k)} for q in queries]
+
+    report = {"documents": len(exact_index), "dim": exact_index.dim, "k": k, "modes": {}}
+    for mode in QUANTIZATIONS:
+        index = NumpyVectorIndex(directory, quantization=mode, rerank_factor=rerank_factor)
+        index.search(queries[0], k)  # warm up (page in the memory map)
+
+        latencies = []
+        recalls = []
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            results = index.search(query, k)
+            latencies.append(time.perf_counter() - start)
+            recalls.append(len({r["link"] for r, _ in results} & expected) / len(expected))
+
+        report["modes"][mode or "float32"] = {
+            "scan_bytes": index.memory_bytes(),
+            "latency_p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3),
+            "latency_p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 3),
+            f"recall@{k}": round(float(np.mean(recalls)), 4),
+        }
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index", help="Existing NumPy index directory (default: synthetic data)")
+    parser.add_argument("--n", type=int, default=20000, help="Synthetic documents")
+    parser.add_argument("--dim", type=int, default=768, help="Synthetic vector size")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rerank-factor", type=int, default=10)
+    parser.add_argument("--output", help="Write the JSON report here as well as stdout")
+    args = parser.parse_args()
+
+    tmp_dir = None
+    directory = args.index
+    if directory is None:
+        tmp_dir = tempfile.mkdtemp(prefix="quant-bench-")
+        directory = tmp_dir
+        print(f"Building synthetic index: {args.n} x {args.dim}", file=sys.stderr)
+        synthetic_index(directory, args.n, args.dim)
+
+    try:
+        queries = make_queries(directory, args.queries)
+        report = run(directory, queries, args.k, args.rerank_factor)
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+if __name__ == "__main__":
+    main()
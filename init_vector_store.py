@@ -2,10 +2,15 @@
 """
 Script to initialize the vector store with all available articles.
 Run this script to set up the RAG search functionality.
+
+Usage:
+    python3 init_vector_store.py                          # index new articles
+    python3 init_vector_store.py --backfill --workers 16  # encode with a process pool
 """
 
 import sys
 import os
+import argparse
 from pathlib import Path
 
 # Add the project root to the Python path
@@ -13,13 +18,34 @@ project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
 from rag.embedding import initialize_vector_store
+from agents.doc_loader.catalog import bump_generation, rebuild_manifest
 
 def main():
+    parser = argparse.ArgumentParser(description="Initialize the vector store with all available articles")
+    parser.add_argument("--backfill", action="store_true",
+                        help="Encode documents in a multi-process pool (for full re-indexes)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Encoder processes in backfill mode (default: cores / threads per worker)")
+    parser.add_argument("--threads-per-worker", type=int, default=2,
+                        help="Torch threads (and pinned cores) per encoder process")
+    args = parser.parse_args()
+
     print("🚀 Initializing AI News Vector Store...")
     print("=" * 50)
     
     try:
-        initialize_vector_store()
+        # The manifest is generated, not committed; web workers only read it
+        manifest = rebuild_manifest()
+        print(f"📚 Catalog manifest lists {len(manifest['weeks'])} data files")
+        if args.backfill:
+            from rag.encoder_pool import default_workers
+            workers = args.workers or default_workers(args.threads_per_worker)
+            added = initialize_vector_store(workers=workers, threads_per_worker=args.threads_per_worker)
+        else:
+            added = initialize_vector_store()
+        if added:
+            # Running web workers reopen their stores
+            bump_generation("init_vector_store")
         print("✅ Vector store initialization completed successfully!")
         print("\nYou can now run the Flask app with: python app.py")
     except Exception as e:
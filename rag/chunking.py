@@ -0,0 +1,68 @@
+"""
+Split article bodies into overlapping chunks for full-content embedding.
+
+Each article is indexed as one "summary" document (title + summary, as
+before) plus "content" documents covering the full scraped body, so
+searches can match facts deep in an article. Every chunk carries the
+article's id, link, title and summary in its metadata so search results can be
+aggregated back to one hit per article.
+"""
+import os
+import hashlib
+
+from langchain.schema import Document
+
+# Sizes are in words; MPNet truncates at 384 word pieces, so keep chunks well under that
+CHUNK_SIZE = int(os.environ.get("CHUNK_SIZE", "200"))
+CHUNK_OVERLAP = int(os.environ.get("CHUNK_OVERLAP", "40"))
+EMBED_FULL_CONTENT = os.environ.get("EMBED_FULL_CONTENT", "true").lower() in ("1", "true", "yes")
+
+def chunk_text(text, size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
+    """Split text into windows of `size` words, consecutive windows sharing `overlap` words."""
+    if overlap >= size:
+        raise ValueError("CHUNK_OVERLAP must be smaller than CHUNK_SIZE")
+    words = (text or "").split()
+    if not words:
+        return []
+    step = size - overlap
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(" ".join(words[start:start + size]))
+        if start + size >= len(words):
+            break
+    return chunks
+
+def article_key(article):
+    """Stable article id (the feed id, or a hash of the link for older data)."""
+    return article.get('id') or hashlib.md5(article['link'].encode("utf-8")).hexdigest()
+
+def summary_document(article):
+    """The title + summary document every article has always been indexed with."""
+    # Get summary or description, fallback to content if neither exists
+    summary = article.get('summary') or article.get('description') or article.get('content', '')[:500] + "..."
+    content = f"title: {article['title']} | summary: {summary} | link: {article['link']}"
+    metadata = {
+        "article_id": article_key(article),
+        "link": article['link'],
+        "week": article['week'],
+        "title": article['title'],
+        "summary": summary,
+        "kind": "summary",
+    }
+    return f"{article_key(article)}:summary", Document(page_content=content, metadata=metadata)
+
+def content_documents(article, size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
+    """Yield (id, Document) for each chunk of the article's full content."""
+    summary = article.get('summary') or article.get('description') or ""
+    for i, chunk in enumerate(chunk_text(article.get('content', ""), size, overlap)):
+        metadata = {
+            "article_id": article_key(article),
+            "link": article['link'],
+            "week": article['week'],
+            "title": article['title'],
+            "summary": summary,
+            "kind": "content",
+            "chunk": i,
+        }
+        # Prefix the title so a chunk embeds with the article's topic in view
+        yield f"{article_key(article)}:{i}", Document(page_content=f"{article['title']}\n{chunk}", metadata=metadata)
@@ -0,0 +1,303 @@
+"""
+Selectable CPU inference backends for the sentence embedding model.
+
+EMBEDDING_BACKEND picks how embeddings are computed:
+    torch       - stock sentence-transformers through HuggingFaceEmbeddings (default)
+    torch-int8  - the same model with its Linear layers dynamically quantized to int8
+    onnx        - ONNX Runtime over a graph exported once from the same weights
+    onnx-int8   - the exported graph with dynamic int8 weight quantization
+    fake        - deterministic hashed bag-of-words vectors for offline load tests
+    remote      - the shared embedding server (rag/embedding_server.py), so the
+                  model is loaded once instead of once per web worker
+
+ONNX exports are cached under EMBEDDING_CACHE_DIR/<model>/. The first time a
+non-default backend is used it is checked against the torch model: pairwise
+cosine similarities over a fixed sample must stay within
+EMBEDDING_PARITY_TOLERANCE of the reference. The result is cached next to
+the export; a backend that fails the check falls back to torch.
+
+The ONNX backends need onnxruntime (installed with chromadb) and, to export,
+the onnx package.
+
+Usage:
+    python3 -m rag.embedders parity [backend]   - Re-run the parity check and print the report
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import inspect
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_huggingface.embeddings import HuggingFaceEmbeddings
+
+# Changing the model changes the vector size: rebuild the vector store after switching
+MODEL_NAME = os.environ.get("EMBEDDING_MODEL", "sentence-transformers/all-mpnet-base-v2")
+EMBEDDING_BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8", "fake", "remote")
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "torch")
+EMBEDDING_CACHE_DIR = os.environ.get("EMBEDDING_CACHE_DIR") or str(Path(__file__).resolve().parent.parent / "models")
+EMBEDDING_PARITY_TOLERANCE = float(os.environ.get("EMBEDDING_PARITY_TOLERANCE", "0.02"))
+# ONNX Runtime intra-op threads; 0 lets the runtime decide
+EMBEDDING_THREADS = int(os.environ.get("EMBEDDING_THREADS", "0"))
+# Simulated per-call encode time of the fake backend (seconds)
+EMBEDDING_FAKE_LATENCY = float(os.environ.get("EMBEDDING_FAKE_LATENCY", "0"))
+
+# Input truncation when a model doesn't publish sentence_bert_config.json
+MAX_SEQ_LENGTH = 384
+
+PARITY_TEXTS = [
+    "VaxSeer flu vaccine AI",
+    "MIT researchers use machine learning to predict which flu strains will dominate next season.",
+    "A new robot learns to fold laundry by watching human demonstrations.",
+    "Large language models still struggle with multi-step arithmetic reasoning.",
+    "Generative AI tool designs novel antibiotics against drug-resistant bacteria.",
+    "Engineers build a low-power chip for running neural networks on wearable devices.",
+    "Study finds AI-generated text is harder to detect than expected.",
+    "Climate scientists use deep learning to downscale regional rainfall forecasts.",
+    "latest news on reinforcement learning",
+    "The weather was pleasant and the market was crowded with tourists.",
+]
+
+def _model_dir(model_name, cache_dir=EMBEDDING_CACHE_DIR):
+    return Path(cache_dir) / model_name.replace("/", "--")
+
+def _atomic_path(final_path):
+    fd, tmp_path = tempfile.mkstemp(dir=final_path.parent, suffix=".tmp")
+    os.close(fd)
+    return tmp_path
+
+# ----------------------
+# ONNX Runtime
+# ----------------------
+def export_onnx(model_name, cache_dir=EMBEDDING_CACHE_DIR, quantize=False):
+    """Export the transformer to ONNX once (and its int8 variant if asked); returns the .onnx path."""
+    directory = _model_dir(model_name, cache_dir)
+    fp32_path = directory / "model.onnx"
+    int8_path = directory / "model.int8.onnx"
+
+    if not fp32_path.exists():
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+        from huggingface_hub import hf_hub_download
+
+        print(f"📦 Exporting {model_name} to ONNX in {directory}")
+        directory.mkdir(parents=True, exist_ok=True)
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModel.from_pretrained(model_name).eval()
+
+        # sentence-transformers models list their pipeline (pooling, normalize) in modules.json
+        with open(hf_hub_download(model_name, "modules.json"), "r", encoding="utf-8") as f:
+            modules = json.load(f)
+        normalize = any(module["type"].endswith("Normalize") for module in modules)
+        try:
+            with open(hf_hub_download(model_name, "sentence_bert_config.json"), "r", encoding="utf-8") as f:
+                max_seq_length = json.load(f).get("max_seq_length", MAX_SEQ_LENGTH)
+        except Exception:
+            max_seq_length = MAX_SEQ_LENGTH
+
+        sample = tokenizer(["hello world"], return_tensors="pt")
+        dynamic = {0: "batch", 1: "sequence"}
+        # torch >= 2.5 defaults to the dynamo exporter; the TorchScript one has no extra dependencies
+        extra = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+        tmp_path = _atomic_path(fp32_path)
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                (sample["input_ids"], sample["attention_mask"]),
+                tmp_path,
+                input_names=["input_ids", "attention_mask"],
+                output_names=["last_hidden_state"],
+                dynamic_axes={"input_ids": dynamic, "attention_mask": dynamic, "last_hidden_state": dynamic},
+                opset_version=17,
+                **extra,
+            )
+        tokenizer.save_pretrained(directory)
+        with open(directory / "export.json", "w", encoding="utf-8") as f:
+            json.dump({"model": model_name, "pooling": "mean", "normalize": normalize, "max_seq_length": max_seq_length}, f, indent=2)
+        os.replace(tmp_path, fp32_path)
+        # A new export invalidates earlier parity results
+        (directory / "parity.json").unlink(missing_ok=True)
+
+    if not quantize:
+        return fp32_path
+    if not int8_path.exists():
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        print(f"📦 Quantizing {fp32_path.name} to int8")
+        tmp_path = _atomic_path(int8_path)
+        quantize_dynamic(str(fp32_path), tmp_path, weight_type=QuantType.QInt8)
+        os.replace(tmp_path, int8_path)
+    return int8_path
+
+class OnnxEmbeddings(Embeddings):
+    """Mean-pooled sentence embeddings computed with ONNX Runtime."""
+
+    def __init__(self, model_name, quantize=False, cache_dir=EMBEDDING_CACHE_DIR, batch_size=32):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.model_path = export_onnx(model_name, cache_dir, quantize)
+        directory = self.model_path.parent
+        with open(directory / "export.json", "r", encoding="utf-8") as f:
+            export = json.load(f)
+        self.normalize = export["normalize"]
+        self.max_seq_length = export.get("max_seq_length", MAX_SEQ_LENGTH)
+        self.tokenizer = AutoTokenizer.from_pretrained(directory)
+        self.batch_size = batch_size
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if EMBEDDING_THREADS:
+            options.intra_op_num_threads = EMBEDDING_THREADS
+        self.session = ort.InferenceSession(str(self.model_path), options, providers=["CPUExecutionProvider"])
+
+    def _encode(self, texts):
+        batches = []
+        for start in range(0, len(texts), self.batch_size):
+            # Same preprocessing as HuggingFaceEmbeddings
+            batch = [text.replace("\n", " ") for text in texts[start:start + self.batch_size]]
+            encoded = self.tokenizer(batch, padding=True, truncation=True, max_length=self.max_seq_length, return_tensors="np")
+            mask = encoded["attention_mask"].astype(np.int64)
+            hidden = self.session.run(None, {"input_ids": encoded["input_ids"].astype(np.int64), "attention_mask": mask})[0]
+            weights = mask[..., None].astype(np.float32)
+            pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+            if self.normalize:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            batches.append(pooled)
+        return np.concatenate(batches) if batches else np.zeros((0, 0), dtype=np.float32)
+
+    def embed_documents(self, texts):
+        return self._encode(list(texts)).tolist()
+
+    def embed_query(self, text):
+        return self._encode([text])[0].tolist()
+
+# ----------------------
+# Offline fake
+# ----------------------
+class FakeEmbeddings(Embeddings):
+    """Hashed bag-of-words vectors: deterministic, model-free, and shared words still score as similar."""
+
+    def __init__(self, dim=768, latency=EMBEDDING_FAKE_LATENCY):
+        self.dim = dim
+        self.latency = latency
+
+    def _vector(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in text.lower().split():
+            vector[int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % self.dim] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+# ----------------------
+# Dynamic int8 torch
+# ----------------------
+def quantized_torch_embeddings(model_name):
+    """HuggingFaceEmbeddings with every Linear layer dynamically quantized to int8."""
+    import torch
+    embeddings = HuggingFaceEmbeddings(model_name=model_name)
+    embeddings._client = torch.ao.quantization.quantize_dynamic(embeddings._client, {torch.nn.Linear}, dtype=torch.qint8)
+    return embeddings
+
+# ----------------------
+# Parity check
+# ----------------------
+def check_parity(candidate, reference, texts=PARITY_TEXTS, tolerance=EMBEDDING_PARITY_TOLERANCE):
+    """Compare a backend's embeddings against the reference model on the same texts.
+
+    Reports the lowest cosine between the two backends' vectors for the same
+    text and the largest change in any pairwise cosine similarity.
+    """
+    a = np.asarray(candidate.embed_documents(texts), dtype=np.float64)
+    b = np.asarray(reference.embed_documents(texts), dtype=np.float64)
+    a /= np.linalg.norm(a, axis=1, keepdims=True)
+    b /= np.linalg.norm(b, axis=1, keepdims=True)
+    self_cosine = float((a * b).sum(axis=1).min())
+    pairwise_diff = float(np.abs(a @ a.T - b @ b.T).max())
+    return {
+        "texts": len(texts),
+        "min_self_cosine": round(self_cosine, 6),
+        "max_pairwise_diff": round(pairwise_diff, 6),
+        "tolerance": tolerance,
+        "passed": pairwise_diff <= tolerance and 1 - self_cosine <= tolerance,
+    }
+
+def _load_candidate(model_name, backend):
+    if backend == "torch-int8":
+        return quantized_torch_embeddings(model_name)
+    if backend in ("onnx", "onnx-int8"):
+        return OnnxEmbeddings(model_name, quantize=backend == "onnx-int8")
+    raise ValueError(f"EMBEDDING_BACKEND must be one of {EMBEDDING_BACKENDS}")
+
+def _parity_file(model_name):
+    return _model_dir(model_name) / "parity.json"
+
+def run_parity(model_name, backend, candidate=None, reference=None):
+    """Check a backend against torch and record the result next to the export."""
+    candidate = candidate or _load_candidate(model_name, backend)
+    reference = reference or HuggingFaceEmbeddings(model_name=model_name)
+    report = check_parity(candidate, reference)
+
+    path = _parity_file(model_name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    results = {}
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            results = json.load(f)
+    results[backend] = report
+    tmp_path = _atomic_path(path)
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    os.replace(tmp_path, path)
+    return report
+
+def create_embeddings(model_name, backend=EMBEDDING_BACKEND):
+    """Return a LangChain Embeddings object for the selected backend."""
+    if backend == "torch":
+        return HuggingFaceEmbeddings(model_name=model_name)
+    if backend == "fake":
+        return FakeEmbeddings()
+    if backend == "remote":
+        from rag.embedding_server import RemoteEmbeddings
+        return RemoteEmbeddings()
+
+    candidate = _load_candidate(model_name, backend)
+    try:
+        with open(_parity_file(model_name), "r", encoding="utf-8") as f:
+            report = json.load(f).get(backend)
+    except (FileNotFoundError, json.JSONDecodeError):
+        report = None
+
+    reference = None
+    if report is None:
+        print(f"🔍 Checking {backend} embeddings against the torch model...")
+        reference = HuggingFaceEmbeddings(model_name=model_name)
+        report = run_parity(model_name, backend, candidate, reference)
+    if not report["passed"]:
+        print(f"❌ {backend} embeddings failed the parity check ({report}); using torch")
+        return reference or HuggingFaceEmbeddings(model_name=model_name)
+    print(f"✅ Using {backend} embeddings (max pairwise cosine diff {report['max_pairwise_diff']})")
+    return candidate
+
+def main():
+    command = sys.argv[1].lower() if len(sys.argv) > 1 else ""
+    if command == "parity":
+        backend = sys.argv[2] if len(sys.argv) > 2 else EMBEDDING_BACKEND
+        print(json.dumps(run_parity(MODEL_NAME, backend), indent=2))
+    else:
+        print("Usage:")
+        print("  python3 -m rag.embedders parity [backend]   - Re-run the parity check and print the report")
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,248 @@
 from pathlib import Path
 import os
 import json
+import uuid
+import numpy as np
 from dotenv import load_dotenv
 from langchain.schema import Document
-from langchain_huggingface.embeddings import HuggingFaceEmbeddings
+from rag.embedders import MODEL_NAME, create_embeddings
 from langchain_community.vectorstores import Chroma
+from rag.lexical import BM25Index
+from rag.indexing import build_index, new_documents, write_batch
 
 from pathlib import Path
 import shutil
 
 load_dotenv()
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
+
+# Default locations are under the project root, so the ingest pipeline (run from agents/doc_loader) uses the same stores
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+CHROMA_DIR = str(PROJECT_ROOT / "chroma_langchain_db")
+
+# "chroma" (default) or "numpy" for the in-memory index in rag/numpy_index.py
+VECTOR_BACKEND = os.environ.get("VECTOR_BACKEND", "chroma")
+NUMPY_INDEX_DIR = os.environ.get("NUMPY_INDEX_DIR", str(PROJECT_ROOT / "numpy_index"))
+# First-stage scan precision for the numpy backend: "none" or "int8" (4x less memory, same speed)
+NUMPY_QUANTIZATION = os.environ.get("NUMPY_QUANTIZATION", "none")
+NUMPY_RERANK_FACTOR = int(os.environ.get("NUMPY_RERANK_FACTOR", "10"))
+# Documents encoded and written per add_documents call while indexing
+EMBED_BATCH_SIZE = int(os.environ.get("EMBED_BATCH_SIZE", "64"))
+# Bulk indexing progress, kept next to the store it describes
+INDEX_CHECKPOINT_PATH = os.environ.get(
+    "INDEX_CHECKPOINT_PATH",
+    os.path.join(NUMPY_INDEX_DIR if VECTOR_BACKEND == "numpy" else CHROMA_DIR, "index_checkpoint.json"),
+)
     
-# Initialize embeddings
-model_name = "sentence-transformers/all-mpnet-base-v2"  
-embeddings = HuggingFaceEmbeddings(model_name=model_name)
+# Initialize embeddings (EMBEDDING_BACKEND selects torch, torch-int8, onnx or onnx-int8; see rag/embedders.py)
+model_name = MODEL_NAME
+embeddings = create_embeddings(model_name)
+
+# ----------------------
+# Vector backends
+# ----------------------
+class VectorBackend:
+    """Interface the app and indexer use to talk to a vector store.
+
+    Scores returned by the search methods are cosine distances (0 = identical),
+    matching distance_to_confidence.
+    """
+
+    def add_documents(self, docs, ids=None):
+        raise NotImplementedError
+
+    def add_embeddings(self, docs, vectors, ids=None):
+        """Store documents whose vectors were already computed (e.g. by an encoder pool)."""
+        raise NotImplementedError
+
+    def existing_links(self, kind="summary"):
+        """Return the set of article links that already have documents of this kind stored.
+
+        kind is "summary" (title + summary documents) or "content" (full-content chunks).
+        """
+        raise NotImplementedError
+
+    def count(self):
+        raise NotImplementedError
+
+    def reopen(self):
+        """A new backend over the same store that sees documents other processes added since this one was opened.
+
+        This backend stays usable, so searches already running on it can finish.
+        """
+        raise NotImplementedError
+
+    def similarity_search_by_vector_with_score(self, vector, k=4, week_filter=None):
+        raise NotImplementedError
+
+    def similarity_search_with_score(self, query, k=4, week_filter=None):
+        return self.similarity_search_by_vector_with_score(embeddings.embed_query(query), k, week_filter)
+
+def _kind(metadata):
+    # Documents indexed before chunking have no "kind"; they are all summary documents
+    return metadata.get("kind", "summary")
+
+def _week_where(week_filter):
+    if week_filter and week_filter != "all":
+        return {"week": week_filter}
+    return None
+
+# Chroma's default space is l2; cosine makes its distances match NumpyBackend's (1 - cosine similarity)
+CHROMA_METADATA = {"hnsw:space": "cosine"}
+
+class ChromaBackend(VectorBackend):
+    """Chroma collection persisted in SQLite (the default backend).
+
+    Collections created before CHROMA_METADATA are in the l2 space. Searches
+    on them report cosine distances anyway; the first write (or
+    init_vector_store.py) moves them to a cosine collection.
+    """
+
+    def __init__(self, persist_directory=CHROMA_DIR, collection_name="example_collection", client=None):
+        self.persist_directory = persist_directory
+        self.collection_name = collection_name
+        # Opened without metadata: passing it would overwrite an l2 collection's metadata, not its index
+        self.store = Chroma(
+            collection_name=collection_name,
+            embedding_function=embeddings,
+            persist_directory=persist_directory,
+            client=client,
+        )
+
+    @property
+    def cosine(self):
+        return (self.store._collection.metadata or {}).get("hnsw:space") == "cosine"
+
+    def migrate_to_cosine(self):
+        """Recreate an l2 collection in the cosine space from its stored vectors (no re-encoding); returns rows moved."""
+        if self.cosine:
+            return 0
+        rows = self.store._collection.get(include=["embeddings", "metadatas", "documents"])
+        client = self.store._client
+        client.delete_collection(self.collection_name)
+        self.store = Chroma(
+            collection_name=self.collection_name,
+            embedding_function=embeddings,
+            persist_directory=self.persist_directory,
+            collection_metadata=CHROMA_METADATA,
+            client=client,
+        )
+        ids = rows["ids"]
+        for start in range(0, len(ids), EMBED_BATCH_SIZE):
+            end = start + EMBED_BATCH_SIZE
+            self.store._collection.add(
+                ids=ids[start:end],
+                embeddings=rows["embeddings"][start:end],
+                metadatas=rows["metadatas"][start:end],
+                documents=rows["documents"][start:end],
+            )
+        return len(ids)
+
+    def add_documents(self, docs, ids=None):
+        self.migrate_to_cosine()
+        self.store.add_documents(docs, ids=ids)
+
+    def add_embeddings(self, docs, vectors, ids=None):
+        self.migrate_to_cosine()
+        self.store._collection.upsert(
+            ids=ids or [str(uuid.uuid4()) for _ in docs],
+            embeddings=[list(map(float, vector)) for vector in vectors],
+            metadatas=[doc.metadata for doc in docs],
+            documents=[doc.page_content for doc in docs],
+        )
+
+    def existing_links(self, kind="summary"):
+        existing_metadatas = self.store._collection.get(include=["metadatas"])["metadatas"]
+        return {meta["link"] for meta in existing_metadatas if meta and meta.get("link") and _kind(meta) == kind}
+
+    def count(self):
+        return self.store._collection.count()
+
+    def reopen(self):
+        # Only the collection handle is new: it reads from the same SQLite file through the
+        # process's existing client, so no second chromadb System (connections, threads) is started
+        return ChromaBackend(self.persist_directory, self.collection_name, client=self.store._client)
+
+    def similarity_search_by_vector_with_score(self, vector, k=4, week_filter=None):
+        if self.cosine:
+            return self.store.similarity_search_by_vector_with_relevance_scores(
+                vector, k=k, filter=_week_where(week_filter)
+            )
+        # Not migrated yet: Chroma ranks by L2, the scores are recomputed as cosine distances
+        results = self.store._collection.query(
+            query_embeddings=[list(map(float, vector))], n_results=k, where=_week_where(week_filter),
+            include=["documents", "metadatas", "embeddings"],
+        )
+        if not results["ids"][0]:
+            return []
+        rows = np.asarray(results["embeddings"][0], dtype=np.float32)
+        query = np.asarray(vector, dtype=np.float32)
+        similarity = rows @ query / np.maximum(np.linalg.norm(rows, axis=1) * np.linalg.norm(query), 1e-12)
+        return [
+            (Document(page_content=text, metadata=metadata or {}), 1 - float(score))
+            for text, metadata, score in zip(results["documents"][0], results["metadatas"][0], similarity)
+        ]
+
+class NumpyBackend(VectorBackend):
+    """Memory-mapped NumPy matrix with vectorized cosine top-k."""
+
+    def __init__(self, directory=NUMPY_INDEX_DIR, quantization=NUMPY_QUANTIZATION, rerank_factor=NUMPY_RERANK_FACTOR):
+        from rag.numpy_index import NumpyVectorIndex
+        self.index = NumpyVectorIndex(
+            directory,
+            quantization=None if quantization == "none" else quantization,
+            rerank_factor=rerank_factor,
+        )
+
+    def add_documents(self, docs, ids=None):
+        if not docs:
+            return
+        vectors = embeddings.embed_documents([doc.page_content for doc in docs])
+        self.add_embeddings(docs, vectors, ids)
+
+    def add_embeddings(self, docs, vectors, ids=None):
+        self.index.add(vectors, [dict(doc.metadata, page_content=doc.page_content) for doc in docs])
+
+    def existing_links(self, kind="summary"):
+        return {record["link"] for record in self.index.records if record.get("link") and _kind(record) == kind}
+
+    def count(self):
+        return len(self.index)
+
+    def reopen(self):
+        index = self.index
+        return NumpyBackend(index.directory, index.quantization or "none", index.rerank_factor)
+
+    def similarity_search_by_vector_with_score(self, vector, k=4, week_filter=None):
+        results = []
+        for record, similarity in self.index.search(vector, k=k, where=_week_where(week_filter)):
+            metadata = {key: value for key, value in record.items() if key != "page_content"}
+            results.append((Document(page_content=record["page_content"], metadata=metadata), 1 - similarity))
+        return results
+
+def create_vector_backend(name=VECTOR_BACKEND):
+    if name == "numpy":
+        return NumpyBackend()
+    if name == "chroma":
+        return ChromaBackend()
+    raise ValueError(f"Unknown VECTOR_BACKEND: {name}")
 
 # Create or load vector store
-vector_store = Chroma(
-    collection_name="example_collection",
-    embedding_function=embeddings,
-    persist_directory="./chroma_langchain_db",
-)
+vector_store = create_vector_backend()
+
+# Lexical (BM25) index used for hybrid search, persisted next to the vector store
+LEXICAL_INDEX_PATH = os.environ.get("LEXICAL_INDEX_PATH", os.path.join(CHROMA_DIR, "bm25_index.json"))
+lexical_index = BM25Index.load(LEXICAL_INDEX_PATH)
+
+def reload_stores():
+    """Reopen the vector store and the BM25 index to see documents another process added; returns both.
+
+    The previous store objects are not closed: requests still holding them finish on them.
+    """
+    global vector_store, lexical_index
+    vector_store = vector_store.reopen()
+    lexical_index = BM25Index.load(LEXICAL_INDEX_PATH)
+    return vector_store, lexical_index
 
 def news_embedding(data_file):
     if not data_file.exists():
@@ -32,39 +253,31 @@ def news_embedding(data_file):
 
     # Get all existing links in the vector store
     # Use metadata 'link' to detect duplicates
-    existing_links = set()
+    existing_links, chunked_links = set(), set()
     try:
-        # Chroma stores metadata in _collection internally
-        existing_metadatas = vector_store._collection.get()["metadatas"]
-        for meta in existing_metadatas:
-            if meta and meta.get("link"):  # Added None check
-                existing_links.add(meta["link"])
+        existing_links = vector_store.existing_links("summary")
+        chunked_links = vector_store.existing_links("content")
     except Exception:
         pass  # First run, nothing exists yet
 
-    docs_to_add = []
+    articles = []
     for item in data.get("articles", []):
-        content = f"title: {item['title']} | summary: {item['summary']} | link: {item['link']}"
         if item['link'] in existing_links:
             print(f"Already exists: {item['title']}")
         else:
             print(f"New: {item['title']}")
-            docs_to_add.append(Document(
-                page_content=content,
-                metadata={
-                    "link": item['link'],
-                    "week": week_tag,
-                    "title": item['title']
-                }
-            ))
-
-    if docs_to_add:
-        vector_store.add_documents(docs_to_add)
-        print(f"Added {len(docs_to_add)} new documents to vector store.")
+        articles.append(dict(item, week=week_tag))
+
+    documents = list(new_documents(articles, set(existing_links), chunked_links))
+    added = 0
+    for start in range(0, len(documents), EMBED_BATCH_SIZE):
+        added += write_batch(vector_store, documents[start:start + EMBED_BATCH_SIZE])
+    if added:
+        print(f"Added {added} new documents to vector store.")
     else:
         print("No new documents to add.")
 
-    print(f"Vector store saved to: {os.path.abspath('./chroma_langchain_db')}")
+    print(f"Vector store now holds {vector_store.count()} documents ({VECTOR_BACKEND} backend).")
 
 def get_week_tag():
     """Get current week tag"""
@@ -72,104 +285,34 @@ def get_week_tag():
     year, week, _ = datetime.now().isocalendar()
     return f"{year}-W{week:02d}"
 
-def load_all_articles():
-    """Load all available articles from data directory"""
-    # Get the project root directory
-    project_root = Path(__file__).parent.parent
-    data_dir = project_root / "data"
-    all_articles = []
-    
-    print(f"Looking for data files in: {data_dir}")
-    
-    # Load general news file
-    general_file = data_dir / "mit_ai_news.json"
-    if general_file.exists():
-        print(f"Loading general news from: {general_file}")
-        with open(general_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            # Handle both list format and object with articles key
-            if isinstance(data, list):
-                articles = data
-            else:
-                articles = data.get("articles", [])
-            
-            for article in articles:
-                article["week"] = "all"
-                all_articles.append(article)
-        print(f"Loaded {len(articles)} articles from general news")
-    
-    # Load weekly files
-    weekly_files = list(data_dir.glob("week-*.json"))
-    print(f"Found {len(weekly_files)} weekly files")
-    
-    for file_path in weekly_files:
-        week_name = file_path.stem.replace("week-", "")
-        print(f"Loading week {week_name} from: {file_path}")
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            # Handle both list format and object with articles key
-            if isinstance(data, list):
-                articles = data
-            else:
-                articles = data.get("articles", [])
-            
-            for article in articles:
-                article["week"] = week_name
-                all_articles.append(article)
-        print(f"Loaded {len(articles)} articles from week {week_name}")
-    
-    print(f"Total articles loaded: {len(all_articles)}")
-    return all_articles
+def initialize_vector_store(workers=None, threads_per_worker=None):
+    """Index every data file into the vector store and the BM25 index, resuming an interrupted run
 
-def initialize_vector_store():
-    """Initialize vector store with all available articles"""
+    With `workers`, documents are encoded by a process pool (backfill mode).
+    Returns the number of documents added, plus any moved by migrate_to_cosine (so the caller
+    bumps the index generation and web workers reopen the new collection).
+    """
     try:
-        all_articles = load_all_articles()
-        if not all_articles:
-            print("No articles found to embed")
-            return
-        
-        # Get existing links
-        existing_links = set()
-        try:
-            existing_metadatas = vector_store._collection.get()["metadatas"]
-            for meta in existing_metadatas:
-                if meta and meta.get("link"):
-                    existing_links.add(meta["link"])
-        except Exception:
-            pass
-        
-        docs_to_add = []
-        for article in all_articles:
-            # Get summary or description, fallback to content if neither exists
-            summary = article.get('summary') or article.get('description') or article.get('content', '')[:500] + "..."
-            content = f"title: {article['title']} | summary: {summary} | link: {article['link']}"
-            if article['link'] not in existing_links:
-                docs_to_add.append(Document(
-                    page_content=content,
-                    metadata={
-                        "link": article['link'],
-                        "week": article['week'],
-                        "title": article['title']
-                    }
-                ))
-        
-        if docs_to_add:
-            vector_store.add_documents(docs_to_add)
-            print(f"Added {len(docs_to_add)} new documents to vector store.")
+        moved = 0
+        if isinstance(vector_store, ChromaBackend):
+            moved = vector_store.migrate_to_cosine()
+            if moved:
+                print(f"Moved {moved} documents to a cosine-distance collection.")
+        if workers:
+            from rag.encoder_pool import EncoderPool
+            with EncoderPool(model_name, workers, threads_per_worker or 2) as pool:
+                print(f"Encoding with {pool.workers} worker processes x {pool.threads_per_worker} threads")
+                added = build_index(vector_store, lexical_index, LEXICAL_INDEX_PATH, INDEX_CHECKPOINT_PATH, EMBED_BATCH_SIZE, encoder=pool)
+        else:
+            added = build_index(vector_store, lexical_index, LEXICAL_INDEX_PATH, INDEX_CHECKPOINT_PATH, EMBED_BATCH_SIZE)
+        if added:
+            print(f"Added {added} new documents to vector store.")
         else:
             print("No new documents to add.")
-            
+        return added + moved
     except Exception as e:
         print(f"Error initializing vector store: {e}")
-
-# Only run if this script is executed directly
-if __name__ == "__main__":
-    # Specify which week to process
-    week_tag = "2025-W36"  # Change week here
-    data_file = Path(f"../data/week-{week_tag}.json")
-    news_embedding(data_file)
-
+        return 0
 
 # FIXED: Proper confidence calculation for cosine distance
 def distance_to_confidence(distance):
@@ -180,45 +323,54 @@ def distance_to_confidence(distance):
     return max(0, min(1, cosine_similarity))
 
 
-# Example query
-query = "VaxSeer flu vaccine AI"  
-docs_scores = vector_store.similarity_search_with_score(query, k=2)
+def example_query(query="VaxSeer flu vaccine AI"):
+    """Run a sample similarity search and print the results."""
+    docs_scores = vector_store.similarity_search_with_score(query, k=2)
 
-threshold = 0.25 
+    threshold = 0.25 
 
-# Filter results based on threshold
-filtered_results = [
-    (doc, distance_to_confidence(score)) 
-    for doc, score in docs_scores
-    if distance_to_confidence(score) >= threshold
-]
+    # Filter results based on threshold
+    filtered_results = [
+        (doc, distance_to_confidence(score)) 
+        for doc, score in docs_scores
+        if distance_to_confidence(score) >= threshold
+    ]
 
-# Deduplicate by link
-unique_links = set()
-deduped_results = []
-for doc, confidence in filtered_results:
-    # Extract link robustly
-    try:
-        parts = {}
-        for item in doc.page_content.split(" | "):
-            if ": " in item:
-                key, value = item.split(": ", 1)
-                parts[key] = value
-        link = parts.get("link", None)
-    except Exception:
-        link = None
-
-    if link and link not in unique_links:
-        unique_links.add(link)
-        deduped_results.append((parts, confidence))
-
-# Handle no results case
-if not deduped_results:
-    print("No results found")
-else:
-    for i, (parts, confidence) in enumerate(deduped_results, start=1):
-        print(f"\nResult {i}:")
-        print("Title:", parts.get("title", "Unknown"))
-        print("Summary:", parts.get("summary", "Unknown"))
-        print("Link:", parts.get("link", "Unknown"))
-        print("Confidence:", round(confidence, 3))
+    # Deduplicate by link
+    unique_links = set()
+    deduped_results = []
+    for doc, confidence in filtered_results:
+        # Extract link robustly
+        try:
+            parts = {}
+            for item in doc.page_content.split(" | "):
+                if ": " in item:
+                    key, value = item.split(": ", 1)
+                    parts[key] = value
+            link = parts.get("link", None)
+        except Exception:
+            link = None
+
+        if link and link not in unique_links:
+            unique_links.add(link)
+            deduped_results.append((parts, confidence))
+
+    # Handle no results case
+    if not deduped_results:
+        print("No results found")
+    else:
+        for i, (parts, confidence) in enumerate(deduped_results, start=1):
+            print(f"\nResult {i}:")
+            print("Title:", parts.get("title", "Unknown"))
+            print("Summary:", parts.get("summary", "Unknown"))
+            print("Link:", parts.get("link", "Unknown"))
+            print("Confidence:", round(confidence, 3))
+
+
+# Only run if this script is executed directly
+if __name__ == "__main__":
+    # Specify which week to process
+    week_tag = "2025-W36"  # Change week here
+    data_file = Path(f"../data/week-{week_tag}.json")
+    news_embedding(data_file)
+    example_query()
@@ -0,0 +1,281 @@
+"""
+Shared embedding service for the web workers.
+
+Each gunicorn/uvicorn worker that embeds in-process loads its own copy of
+the model and its own torch thread pool. Instead, one server process can own
+the model and answer every worker over a Unix socket:
+
+    python3 -m rag.embedding_server                 # serve on EMBEDDING_SOCKET
+    EMBEDDING_BACKEND=remote uvicorn asgi:app ...   # workers embed through it
+
+The server runs the EMBEDDING_SERVER_BACKEND model (any backend from
+rag/embedders.py, default torch). One thread encodes; while it is busy,
+requests from all connections queue up and the next forward pass takes
+everything waiting (up to EMBEDDING_SERVER_BATCH texts), so concurrent
+queries are micro-batched without adding latency when the server is idle.
+
+Wire format, both directions: a 4-byte big-endian length, then the payload.
+Requests are JSON {"texts": [...]}; responses are a status byte, row count
+and dimension, followed by float32 vectors (or a UTF-8 error message).
+"""
+import os
+import sys
+import json
+import time
+import queue
+import signal
+import socket
+import struct
+import tempfile
+import threading
+import socketserver
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+EMBEDDING_SOCKET = os.environ.get("EMBEDDING_SOCKET") or os.path.join(tempfile.gettempdir(), "ai_news_embeddings.sock")
+EMBEDDING_SERVER_BACKEND = os.environ.get("EMBEDDING_SERVER_BACKEND", "torch")
+# Most texts encoded in one forward pass
+EMBEDDING_SERVER_BATCH = int(os.environ.get("EMBEDDING_SERVER_BATCH", "64"))
+# Extra time to wait for more requests before encoding a batch; 0 takes only what is already queued
+EMBEDDING_BATCH_WAIT_MS = float(os.environ.get("EMBEDDING_BATCH_WAIT_MS", "0"))
+EMBEDDING_SERVER_TIMEOUT = float(os.environ.get("EMBEDDING_SERVER_TIMEOUT", "30"))
+
+_LENGTH = struct.Struct("!I")
+_RESULT = struct.Struct("!BII")
+OK, ERROR = 0, 1
+
+# ----------------------
+# Framing
+# ----------------------
+def _send(sock, payload):
+    sock.sendall(_LENGTH.pack(len(payload)) + payload)
+
+def _recv_exact(sock, size):
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            raise ConnectionError("Embedding server connection closed")
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+def _recv(sock):
+    """Next frame, or None if the peer closed the connection between frames."""
+    header = sock.recv(_LENGTH.size, socket.MSG_WAITALL)
+    if not header:
+        return None
+    if len(header) < _LENGTH.size:
+        header += _recv_exact(sock, _LENGTH.size - len(header))
+    return _recv_exact(sock, _LENGTH.unpack(header)[0])
+
+# ----------------------
+# Server
+# ----------------------
+class _Request:
+    __slots__ = ("texts", "event", "vectors", "error")
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.event = threading.Event()
+        self.vectors = None
+        self.error = None
+
+class MicroBatcher:
+    """Encode texts from many threads with one model, batching whatever is queued together."""
+
+    def __init__(self, embeddings, max_batch=EMBEDDING_SERVER_BATCH, max_wait=EMBEDDING_BATCH_WAIT_MS / 1000):
+        self.embeddings = embeddings
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.requests = 0
+        self.batches = 0
+        self.texts = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+        self._thread.start()
+
+    def encode(self, texts):
+        """float32 array of shape (len(texts), dim); blocks until the batch holding them is encoded."""
+        request = _Request(texts)
+        self._queue.put(request)
+        request.event.wait()
+        if request.error is not None:
+            raise request.error
+        return request.vectors
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch, count = [first], len(first.texts)
+        deadline = time.monotonic() + self.max_wait
+        while count < self.max_batch:
+            try:
+                timeout = deadline - time.monotonic()
+                request = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                # Finish this batch, then stop
+                self._queue.put(None)
+                break
+            batch.append(request)
+            count += len(request.texts)
+        return batch
+
+    def _run(self):
+        while (batch := self._next_batch()) is not None:
+            texts = [text for request in batch for text in request.texts]
+            try:
+                vectors = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+            except Exception as e:
+                for request in batch:
+                    request.error = e
+                    request.event.set()
+                continue
+            self.requests += len(batch)
+            self.batches += 1
+            self.texts += len(texts)
+            offset = 0
+            for request in batch:
+                request.vectors = vectors[offset:offset + len(request.texts)]
+                offset += len(request.texts)
+                request.event.set()
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        # One connection per client thread, reused for all of its requests
+        while (payload := _recv(self.request)) is not None:
+            try:
+                texts = json.loads(payload)["texts"]
+                vectors = self.server.batcher.encode(texts) if texts else np.zeros((0, 0), dtype=np.float32)
+                rows, dim = vectors.shape
+                _send(self.request, _RESULT.pack(OK, rows, dim) + vectors.tobytes())
+            except Exception as e:
+                _send(self.request, _RESULT.pack(ERROR, 0, 0) + f"{type(e).__name__}: {e}".encode("utf-8"))
+
+class EmbeddingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    # socketserver's default backlog of 5 refuses connections when many workers start at once
+    request_queue_size = socket.SOMAXCONN
+
+    def __init__(self, path, batcher):
+        self.batcher = batcher
+        _remove_stale_socket(path)
+        super().__init__(path, _Handler)
+        os.chmod(path, 0o660)
+
+def _remove_stale_socket(path):
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)  # Left behind by a server that died
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"An embedding server is already listening on {path}")
+
+def serve(path=EMBEDDING_SOCKET, backend=EMBEDDING_SERVER_BACKEND):
+    from rag.embedders import MODEL_NAME, create_embeddings
+    if backend == "remote":
+        raise ValueError("EMBEDDING_SERVER_BACKEND must be a local backend, not remote")
+
+    print(f"📦 Loading {MODEL_NAME} ({backend})...")
+    batcher = MicroBatcher(create_embeddings(MODEL_NAME, backend))
+    server = EmbeddingServer(path, batcher)
+    # shutdown() waits for serve_forever to return, so it can't run on the serving thread itself
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: threading.Thread(target=server.shutdown).start())
+
+    print(f"🚀 Embedding server listening on {path} (batches of up to {batcher.max_batch} texts)")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.unlink(path)
+        batcher.close()
+        if batcher.batches:
+            print(f"👋 Served {batcher.requests} requests ({batcher.texts} texts) in {batcher.batches} batches, "
+                  f"{batcher.requests / batcher.batches:.1f} requests per batch")
+
+# ----------------------
+# Client
+# ----------------------
+class RemoteEmbeddings(Embeddings):
+    """Embeddings computed by the embedding server; each thread keeps its own connection."""
+
+    def __init__(self, path=EMBEDDING_SOCKET, timeout=EMBEDDING_SERVER_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            deadline = time.monotonic() + self.timeout
+            delay = 0.005
+            while True:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.settimeout(self.timeout)
+                try:
+                    sock.connect(self.path)
+                    break
+                except (BlockingIOError, ConnectionRefusedError) as e:
+                    # Listen backlog full (EAGAIN) or the server is restarting; wait for a slot
+                    sock.close()
+                    if time.monotonic() + delay > deadline:
+                        raise ConnectionError(f"Embedding server not reachable at {self.path}: {e}") from e
+                    time.sleep(delay)
+                    delay = min(delay * 2, 0.1)
+                except OSError as e:
+                    sock.close()
+                    raise ConnectionError(f"Embedding server not reachable at {self.path}: {e}") from e
+            self._local.sock = sock
+        return sock
+
+    def _disconnect(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def _encode(self, texts):
+        payload = json.dumps({"texts": texts}).encode("utf-8")
+        # A kept-alive connection may belong to a server that has since restarted; retry once on a fresh one
+        for attempt in range(2):
+            try:
+                sock = self._connect()
+                _send(sock, payload)
+                response = _recv(sock)
+                if response is None:
+                    raise ConnectionError("Embedding server closed the connection")
+                break
+            except (ConnectionError, OSError):
+                self._disconnect()
+                if attempt:
+                    raise
+        status, rows, dim = _RESULT.unpack_from(response)
+        body = response[_RESULT.size:]
+        if status != OK:
+            raise RuntimeError(f"Embedding server error: {body.decode('utf-8', 'replace')}")
+        return np.frombuffer(body, dtype=np.float32).reshape(rows, dim)
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        if not texts:
+            return []
+        return self._encode(texts).tolist()
+
+    def embed_query(self, text):
+        return self._encode([text])[0].tolist()
+
+if __name__ == "__main__":
+    serve(sys.argv[1] if len(sys.argv) > 1 else EMBEDDING_SOCKET)
@@ -0,0 +1,95 @@
+"""
+Multi-process sentence-transformers encoder for bulk backfills.
+
+A single process only ever uses one set of torch threads, so a full
+re-index on a many-core box leaves most cores idle. EncoderPool spawns
+workers that each load the model once and pin themselves to their own
+slice of cores with a fixed torch thread count (no oversubscription).
+Batches are dispatched with a bounded number in flight and results come
+back in submission order, so the caller can write to the store and
+checkpoint exactly as the single-process indexer does.
+
+This module is imported by the spawned workers, so it must stay light:
+torch and sentence-transformers are only imported inside the worker.
+"""
+import os
+import multiprocessing
+from collections import deque
+
+# Set in each worker by _init_worker
+_model = None
+
+def _init_worker(model_name, threads, counter, cores):
+    global _model
+    with counter.get_lock():
+        worker_index = counter.value
+        counter.value += 1
+
+    # Pin before torch starts its thread pools
+    if cores and hasattr(os, "sched_setaffinity"):
+        start = (worker_index * threads) % len(cores)
+        os.sched_setaffinity(0, set(cores[start:start + threads]) or set(cores))
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+    _model = SentenceTransformer(model_name, device="cpu")
+
+def _encode(texts):
+    # Same preprocessing as HuggingFaceEmbeddings.embed_documents, so vectors match the query side
+    texts = [text.replace("\n", " ") for text in texts]
+    return _model.encode(texts, show_progress_bar=False)
+
+def default_workers(threads_per_worker):
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    return max(1, (cores or 1) // threads_per_worker)
+
+class EncoderPool:
+    """Process pool that encodes text batches in parallel and yields them back in order."""
+
+    def __init__(self, model_name, workers=None, threads_per_worker=2, max_pending=None):
+        self.workers = workers or default_workers(threads_per_worker)
+        self.threads_per_worker = threads_per_worker
+        # Enough queued work to keep every worker busy while the main process writes
+        self.max_pending = max_pending or self.workers * 2
+        cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+        # spawn: forking a process that already loaded torch can deadlock its thread pools
+        context = multiprocessing.get_context("spawn")
+        self._pool = context.Pool(
+            self.workers,
+            initializer=_init_worker,
+            initargs=(model_name, threads_per_worker, context.Value("i", 0), cores),
+        )
+
+    def map_ordered(self, jobs):
+        """Encode an iterable of (tag, texts); yields (tag, vectors) in input order.
+
+        At most max_pending batches are in flight, so a lazy `jobs` iterator
+        is consumed only as fast as results are taken.
+        """
+        pending = deque()
+        for tag, texts in jobs:
+            pending.append((tag, self._pool.apply_async(_encode, (texts,)) if texts else None))
+            if len(pending) >= self.max_pending:
+                yield self._take(pending)
+        while pending:
+            yield self._take(pending)
+
+    @staticmethod
+    def _take(pending):
+        tag, result = pending.popleft()
+        return tag, (result.get() if result is not None else [])
+
+    def close(self):
+        self._pool.terminate()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,227 @@
+"""
+Streaming bulk indexer for the vector store and the BM25 index.
+
+Articles are read one data file at a time (weekly files first, then the raw
+feed dump) and written to the store in batches of about EMBED_BATCH_SIZE
+documents, so peak memory depends on the batch size and the largest single
+file rather than on the size of the archive. Progress is checkpointed after
+every batch: an interrupted rebuild resumes where it stopped, and files that
+have not changed since they were last indexed are skipped without parsing.
+The BM25 index is saved once, at the end of the run; files are only marked
+done after that save.
+
+For backfills, encoding can be fanned out to a process pool
+(rag/encoder_pool.py) while writes and checkpoints stay in order here.
+"""
+import os
+import json
+import time
+import tempfile
+from pathlib import Path
+
+from dateutil import parser as date_parser
+
+from rag.chunking import CHUNK_SIZE, CHUNK_OVERLAP, EMBED_FULL_CONTENT, summary_document, content_documents
+
+DATA_DIR = Path(os.environ.get("NEWS_DATA_DIR") or Path(__file__).resolve().parent.parent / "data").resolve()
+GENERAL_FILE = "mit_ai_news.json"
+
+def iter_data_files(data_dir=DATA_DIR):
+    """Yield (path, week) for every data file, weekly files first; week is None for the raw feed dump.
+
+    Weekly files carry summaries and real week tags, so their articles are
+    indexed before the same articles reappear in the raw feed dump.
+    """
+    for path in sorted(Path(data_dir).glob("week-*.json")):
+        yield path, path.stem.replace("week-", "")
+    general_file = Path(data_dir) / GENERAL_FILE
+    if general_file.exists():
+        yield general_file, None
+
+def article_week(article):
+    """Week tag (e.g. 2025-W35) of an article's date, like news_loader.get_week_tag; "all" if it has no usable date."""
+    try:
+        date = date_parser.parse(article.get("date") or "")
+    except (ValueError, OverflowError):
+        return article.get("week") or "all"
+    year, week_num, _ = date.replace(tzinfo=None).isocalendar()
+    return f"{year}-W{week_num:02d}"
+
+def iter_articles(path, week):
+    """Yield (position, article) for one data file, tagging each article with its week (from its date if week is None)."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    # Handle both list format and object with articles key
+    articles = data if isinstance(data, list) else data.get("articles", [])
+    for position, article in enumerate(articles):
+        article["week"] = week or article_week(article)
+        yield position, article
+
+def new_documents(articles, summary_links, chunked_links, full_content=EMBED_FULL_CONTENT):
+    """Yield (id, Document) for everything not yet in the store; the link sets are updated in place."""
+    for article in articles:
+        link = article['link']
+        if link not in summary_links:
+            summary_links.add(link)
+            yield summary_document(article)
+        if full_content and link not in chunked_links:
+            chunked_links.add(link)
+            yield from content_documents(article)
+
+def write_batch(store, batch):
+    """Encode and store a list of (id, Document) pairs."""
+    if batch:
+        store.add_documents([doc for _, doc in batch], ids=[doc_id for doc_id, _ in batch])
+    return len(batch)
+
+# ----------------------
+# Checkpoint
+# ----------------------
+class IndexCheckpoint:
+    """Per-file indexing progress, persisted as JSON next to the vector store.
+
+    Each file entry records the file's stat signature and how many of its
+    articles are fully written, or None once the whole file is done. The
+    checkpoint is discarded when the chunking settings change or the store
+    holds fewer documents than it did at the last save (e.g. it was wiped).
+    """
+
+    def __init__(self, path, store_count):
+        self.path = path
+        self.settings = {"full_content": EMBED_FULL_CONTENT, "chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP}
+        self.files = {}
+        self.store_count = store_count
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if state.get("settings") != self.settings:
+            print("ℹ️ Chunking settings changed; checkpoint ignored (existing documents are kept as they are)")
+        elif store_count < state.get("store_count", 0):
+            print("ℹ️ Vector store has fewer documents than at the last checkpoint; re-indexing all files")
+        else:
+            self.files = state.get("files", {})
+
+    def resume_position(self, name, signature):
+        """Articles of this file already written (0 to start over), or None if the file is done."""
+        entry = self.files.get(name)
+        if not entry or entry["signature"] != list(signature):
+            return 0
+        return entry["done"]
+
+    def save(self, name, signature, done, store_count):
+        """Record progress for one file; done=None marks the file complete."""
+        self.files[name] = {"signature": list(signature), "done": done}
+        self._write(store_count)
+
+    def complete(self, files, store_count):
+        """Mark several (name, signature) files complete with one write."""
+        for name, signature in files:
+            self.files[name] = {"signature": list(signature), "done": None}
+        self._write(store_count)
+
+    def _write(self, store_count):
+        self.store_count = store_count
+        state = {"settings": self.settings, "store_count": store_count, "files": self.files}
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(state, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+def _signature(path):
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+# ----------------------
+# Bulk indexing
+# ----------------------
+def build_index(store, lexical_index, lexical_path, checkpoint_path, batch_size, data_dir=DATA_DIR, encoder=None):
+    """Stream every data file into the vector store and the BM25 index; returns documents added.
+
+    With an `encoder` (rag.encoder_pool.EncoderPool) batches are encoded in
+    worker processes and written with store.add_embeddings, still in order.
+    """
+    checkpoint = IndexCheckpoint(checkpoint_path, store.count())
+    summary_links, chunked_links = set(), set()
+    try:
+        summary_links = store.existing_links("summary")
+        chunked_links = store.existing_links("content")
+    except Exception:
+        pass  # First run, nothing exists yet
+
+    batches = _iter_batches(checkpoint, lexical_index, summary_links, chunked_links, batch_size, data_dir)
+    if encoder is None:
+        encoded = ((item, None) for item in batches)
+    else:
+        encoded = encoder.map_ordered((item, [doc.page_content for _, doc in item[1]]) for item in batches)
+
+    total_added = 0
+    lexical_size = len(lexical_index)
+    # Files whose documents are all in the store, marked done once the BM25 index is saved
+    finished = []
+    started = time.perf_counter()
+    for ((name, signature, done, last), batch), vectors in encoded:
+        if batch and vectors is not None:
+            store.add_embeddings([doc for _, doc in batch], vectors, ids=[doc_id for doc_id, _ in batch])
+            total_added += len(batch)
+        else:
+            total_added += write_batch(store, batch)
+        # A finished file stays resumable at its end until then, so an interrupted run only re-adds it to BM25
+        checkpoint.save(name, signature, done, store.count())
+        if last:
+            finished.append((name, signature))
+        _report_rate(name, total_added, started)
+
+    if len(lexical_index) != lexical_size:
+        lexical_index.save(lexical_path)
+    if finished:
+        checkpoint.complete(finished, store.count())
+    return total_added
+
+def _iter_batches(checkpoint, lexical_index, summary_links, chunked_links, batch_size, data_dir):
+    """Yield ((file name, signature, articles done, last), batch) for documents still to be written.
+
+    The last batch of each file (possibly empty) carries last=True.
+    """
+    for path, week in iter_data_files(data_dir):
+        signature = _signature(path)
+        resume_at = checkpoint.resume_position(path.name, signature)
+        if resume_at is None:
+            print(f"⏭️ {path.name}: unchanged since last run")
+            continue
+        if resume_at:
+            print(f"↩️ {path.name}: resuming after {resume_at} articles")
+
+        batch = []
+        position = -1
+        for position, article in iter_articles(path, week):
+            # The BM25 index is only saved at the end of a run, so re-add skipped articles (a no-op if present)
+            lexical_index.add(
+                article['link'],
+                title=article['title'],
+                summary=article.get('summary') or article.get('description') or "",
+                content=article.get('content', ""),
+                week=article['week'],
+            )
+            if position < resume_at:
+                continue
+
+            # An article's chunks never straddle batches, so a checkpoint always falls between articles
+            batch.extend(new_documents([article], summary_links, chunked_links))
+            if len(batch) >= batch_size:
+                yield (path.name, signature, position + 1, False), batch
+                batch = []
+
+        yield (path.name, signature, position + 1, True), batch
+
+def _report_rate(name, total_added, started):
+    elapsed = time.perf_counter() - started
+    rate = total_added / elapsed if elapsed else 0.0
+    print(f"📦 {name}: {total_added} documents written ({rate:.1f} docs/sec)")
@@ -0,0 +1,145 @@
+"""
+In-memory BM25 index over article title, summary and content.
+
+Exact titles and named entities (e.g. "VaxSeer") are answered from an
+inverted index without an embedding forward pass. The index is built
+incrementally at ingest time and persisted as JSON next to the vector store.
+"""
+import os
+import re
+import json
+import math
+import heapq
+import tempfile
+import threading
+from collections import Counter
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the this to was were
+will with what which who how about into than their they them these those we you your our
+""".split())
+
+# Title matches count more than body matches (a cheap BM25F approximation)
+FIELD_WEIGHTS = {"title": 3, "summary": 2, "content": 1}
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+
+class BM25Index:
+    """Incremental BM25 index keyed by article link."""
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.docs = []          # per-doc metadata (link, title, summary, week)
+        self.doc_len = []
+        self.postings = {}      # term -> {doc index: weighted term frequency}
+        self._by_link = {}
+        self._total_len = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.docs)
+
+    def __contains__(self, link):
+        return link in self._by_link
+
+    def add(self, link, title="", summary="", content="", week=""):
+        """Index one article; returns False if it is already present."""
+        with self._lock:
+            if link in self._by_link:
+                return False
+            counts = Counter()
+            for field, text in (("title", title), ("summary", summary), ("content", content)):
+                weight = FIELD_WEIGHTS[field]
+                for token in tokenize(text):
+                    counts[token] += weight
+
+            doc_idx = len(self.docs)
+            self.docs.append({"link": link, "title": title, "summary": summary, "week": week})
+            length = sum(counts.values())
+            self.doc_len.append(length)
+            self._total_len += length
+            self._by_link[link] = doc_idx
+            for term, tf in counts.items():
+                self.postings.setdefault(term, {})[doc_idx] = tf
+            return True
+
+    def search(self, query, k=10, week_filter=None):
+        """Return up to k (doc metadata, score) pairs, best first."""
+        terms = set(tokenize(query))
+        n_docs = len(self.docs)
+        if not terms or not n_docs:
+            return []
+
+        avg_len = self._total_len / n_docs
+        scores = {}
+        for term in terms:
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for doc_idx, tf in postings.items():
+                norm = tf + self.k1 * (1 - self.b + self.b * self.doc_len[doc_idx] / avg_len)
+                scores[doc_idx] = scores.get(doc_idx, 0.0) + idf * tf * (self.k1 + 1) / norm
+
+        if week_filter and week_filter != "all":
+            scores = {i: s for i, s in scores.items() if self.docs[i]["week"] == week_filter}
+
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(self.docs[i], score) for i, score in best]
+
+    # ----------------------
+    # Persistence
+    # ----------------------
+    def save(self, path):
+        """Write the index atomically as JSON."""
+        with self._lock:
+            state = {
+                "version": 1,
+                "k1": self.k1,
+                "b": self.b,
+                "docs": self.docs,
+                "doc_len": self.doc_len,
+                "postings": self.postings,
+            }
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(state, f, ensure_ascii=False, separators=(",", ":"))
+                os.replace(tmp_path, path)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+
+    @classmethod
+    def load(cls, path):
+        """Load a saved index, or return an empty one if there is none."""
+        index = cls()
+        if not os.path.exists(path):
+            return index
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        index.k1 = state["k1"]
+        index.b = state["b"]
+        index.docs = state["docs"]
+        index.doc_len = state["doc_len"]
+        # JSON object keys are strings; doc indexes are ints
+        index.postings = {
+            term: {int(i): tf for i, tf in postings.items()}
+            for term, postings in state["postings"].items()
+        }
+        index._by_link = {doc["link"]: i for i, doc in enumerate(index.docs)}
+        index._total_len = sum(index.doc_len)
+        return index
+
+def reciprocal_rank_fusion(ranked_lists, k=60):
+    """Fuse ranked lists of keys with RRF; returns [(key, fused score)] best first."""
+    scores = {}
+    for ranked in ranked_lists:
+        for rank, key in enumerate(ranked):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,246 @@
+"""
+In-memory NumPy vector index.
+
+Vectors are L2-normalized float32 rows in a memory-mapped file, so cosine
+similarity is a single matrix-vector product and top-k is an argpartition.
+Record metadata is kept in a JSON sidecar, with per-field arrays for cheap
+filtering (e.g. by week).
+
+With quantization="int8" the first-stage scan runs over a compact
+in-memory copy of the matrix (per-row scaled int8, 4x smaller than
+float32), and only the best k * rerank_factor candidates are re-scored
+exactly against the float32 rows on disk. This is a memory saving, for
+indexes that don't fit in RAM as float32: the float32 rows are then read
+only for the shortlist. It is not a latency one; NumPy has no fast int8
+kernel, so the scan costs about the same as the exact float32 product.
+
+Layout of the index directory:
+    vectors.f32   - raw float32 rows, appended on every add
+    meta.json     - {"dim": ..., "records": [...]}; written atomically after the rows
+    .lock         - flock held by add(), so several processes can write safely
+"""
+import os
+import json
+import fcntl
+import tempfile
+import threading
+
+import numpy as np
+
+FILTER_FIELDS = ("week",)
+QUANTIZATIONS = (None, "int8")
+
+# Rows converted to float32 at a time during the quantized scan; keeps the
+# reused buffer cache-sized instead of materializing the whole matrix
+SCAN_CHUNK_ROWS = 256
+
+def quantize(matrix, mode):
+    """Return (quantized rows, per-row scales) for a float32 matrix."""
+    if mode == "int8":
+        scales = np.abs(matrix).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        return np.round(matrix / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+    raise ValueError(f"Unknown quantization: {mode}")
+
+class _Snapshot:
+    """Immutable view of the index that searches read while adds build the next one."""
+    __slots__ = ("matrix", "records", "fields", "quantized", "scales")
+
+    def __init__(self, matrix, records, fields, quantized=None, scales=None):
+        self.matrix = matrix
+        self.records = records
+        self.fields = fields
+        self.quantized = quantized
+        self.scales = scales
+
+class _DirectoryLock:
+    """Exclusive flock on the index directory's lock file, shared by every process writing the index."""
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, ".lock")
+
+    def __enter__(self):
+        self._file = open(self.path, "a")
+        fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+
+class NumpyVectorIndex:
+    """Append-only cosine-similarity index over a memory-mapped float32 matrix."""
+
+    def __init__(self, directory, quantization=None, rerank_factor=10):
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"quantization must be one of {QUANTIZATIONS}")
+        self.directory = directory
+        self.quantization = quantization
+        self.rerank_factor = rerank_factor
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.meta_path = os.path.join(directory, "meta.json")
+        self.dim = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._snapshot = self._load()
+
+    def __len__(self):
+        return len(self._snapshot.records)
+
+    def _load(self):
+        records = self._read_records()
+        if not records:
+            return _Snapshot(None, [], {field: np.array([], dtype=object) for field in FILTER_FIELDS})
+        return self._snapshot_for(records)
+
+    def _read_records(self):
+        """Records committed to meta.json (by any process); sets self.dim."""
+        if not os.path.exists(self.meta_path):
+            return []
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.dim = meta["dim"]
+        return meta["records"]
+
+    def _snapshot_for(self, records, previous=None, new_vectors=None):
+        # Rows past len(records) belong to an add that crashed before meta.json was written
+        matrix = None
+        if records:
+            matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(len(records), self.dim))
+        fields = {
+            field: np.array([record.get(field, "") for record in records], dtype=object)
+            for field in FILTER_FIELDS
+        }
+
+        quantized = scales = None
+        if self.quantization and matrix is not None:
+            if previous is not None and previous.quantized is not None and new_vectors is not None:
+                # Only quantize the appended rows
+                q_new, s_new = quantize(new_vectors, self.quantization)
+                quantized = np.concatenate([previous.quantized, q_new])
+                scales = np.concatenate([previous.scales, s_new])
+            else:
+                parts = [
+                    quantize(np.asarray(matrix[start:start + SCAN_CHUNK_ROWS]), self.quantization)
+                    for start in range(0, len(matrix), SCAN_CHUNK_ROWS)
+                ]
+                quantized = np.concatenate([q for q, _ in parts])
+                scales = np.concatenate([s for _, s in parts])
+        return _Snapshot(matrix, records, fields, quantized, scales)
+
+    def memory_bytes(self):
+        """Bytes scanned per unfiltered query: the quantized copy if enabled, else the float32 matrix."""
+        snapshot = self._snapshot
+        if snapshot.matrix is None:
+            return 0
+        if snapshot.quantized is not None:
+            return snapshot.quantized.nbytes + snapshot.scales.nbytes
+        return snapshot.matrix.size * 4
+
+    @property
+    def records(self):
+        return self._snapshot.records
+
+    def add(self, vectors, records):
+        """Append vectors (n x dim) with one metadata dict per row."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(vectors) != len(records):
+            raise ValueError("vectors and records must have the same length")
+        if not len(records):
+            return
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+
+        with self._lock, _DirectoryLock(self.directory):
+            # Another process may have added rows since this one last looked
+            current = self._read_records()
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-dim vectors, got {vectors.shape[1]}")
+
+            # Drop rows from a previously interrupted add before appending
+            with open(self.vectors_path, "ab") as f:
+                f.truncate(len(current) * self.dim * 4)
+                f.write(vectors.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            all_records = current + list(records)
+            self._write_meta(all_records)
+            if len(current) == len(self._snapshot.records):
+                self._snapshot = self._snapshot_for(all_records, self._snapshot, vectors)
+            else:
+                # Rows from other writers are in between; requantize from the file
+                self._snapshot = self._snapshot_for(all_records)
+
+    def _write_meta(self, records):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"dim": self.dim, "records": records}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.meta_path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def search(self, query_vector, k=10, where=None):
+        """Return up to k (record, cosine similarity) pairs, best first.
+
+        `where` is an optional {field: value} equality filter on FILTER_FIELDS.
+        """
+        snapshot = self._snapshot
+        if snapshot.matrix is None or k <= 0:
+            return []
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        candidates = None
+        if where:
+            mask = np.ones(len(snapshot.records), dtype=bool)
+            for field, value in where.items():
+                mask &= snapshot.fields[field] == value
+            candidates = np.flatnonzero(mask)
+            if not len(candidates):
+                return []
+
+        if snapshot.quantized is None:
+            scores = snapshot.matrix[candidates] @ query if candidates is not None else snapshot.matrix @ query
+            top = _top_k(scores, k)
+            rows = candidates[top] if candidates is not None else top
+            return [(snapshot.records[row], float(scores[i])) for row, i in zip(rows, top)]
+
+        # First stage: approximate scores over the quantized rows
+        approx = self._approx_scores(snapshot, query, candidates)
+        shortlist = _top_k(approx, k * self.rerank_factor)
+        rows = candidates[shortlist] if candidates is not None else shortlist
+
+        # Second stage: exact float32 re-rank of the shortlist only
+        rows = np.sort(rows)  # sequential reads from the memory-mapped file
+        exact = snapshot.matrix[rows] @ query
+        top = _top_k(exact, k)
+        return [(snapshot.records[rows[i]], float(exact[i])) for i in top]
+
+    def _approx_scores(self, snapshot, query, rows=None):
+        n = len(rows) if rows is not None else len(snapshot.quantized)
+        scores = np.empty(n, dtype=np.float32)
+        buffer = np.empty((min(SCAN_CHUNK_ROWS, n), snapshot.quantized.shape[1]), dtype=np.float32)
+        for start in range(0, n, SCAN_CHUNK_ROWS):
+            end = min(start + SCAN_CHUNK_ROWS, n)
+            chunk = snapshot.quantized[rows[start:end]] if rows is not None else snapshot.quantized[start:end]
+            converted = buffer[:end - start]
+            np.copyto(converted, chunk, casting="unsafe")
+            np.matmul(converted, query, out=scores[start:end])
+        scores *= snapshot.scales[rows] if rows is not None else snapshot.scales
+        return scores
+
+def _top_k(scores, k):
+    """Indexes of the k highest scores, best first."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.array([], dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
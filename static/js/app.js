@@ -147,11 +147,30 @@ function generateSummary() {
     if (isLoading) return;
     showLoading();
 
-    fetch('/api/summary')
+    // Summaries run as background jobs; identical requests share one job
+    fetch('/api/summary/jobs', { method: 'POST' })
     .then(res => res.json())
     .then(data => {
+        if (!data.success) throw new Error(data.error || 'Failed to start summary');
+        pollSummaryJob(data.job_id);
+    })
+    .catch(err => {
+        hideLoading();
+        console.error(err);
+        displaySummary('Sorry, I encountered an error generating the summary.');
+    });
+}
+
+function pollSummaryJob(jobId) {
+    fetch(`/api/jobs/${jobId}`)
+    .then(res => res.json())
+    .then(job => {
+        if (job.status === 'queued' || job.status === 'running') {
+            setTimeout(() => pollSummaryJob(jobId), 1000);
+            return;
+        }
         hideLoading();
-        if (data.success) displaySummary(data.summary);
+        if (job.status === 'done') displaySummary(job.result);
         else displaySummary('Sorry, I encountered an error generating the summary.');
     })
     .catch(err => {
@@ -229,7 +248,7 @@ function displaySearchResults(data) {
 
     const resultsHtml = results.map(result => `
         <div class="search-result">
-            <h3>${result.title} (${Math.round(result.confidence*100)}% match)</h3>
+            <h3>${result.title} (${result.confidence != null ? `${Math.round(result.confidence*100)}% match` : 'keyword match'})</h3>
             <p>${result.summary}</p>
             <a href="${result.link}" target="_blank">Read Full Article</a>
             <button class="btn ask-about-search-btn" data-title="${result.title}">Ask About This</button>
@@ -266,7 +285,8 @@ function initializeNews() {
 function loadNewsForWeek() {
     const selectedWeek = weekSelector.value;
     showLoading();
-    const url = selectedWeek === 'all' ? '/api/news' : `/api/news?week=${selectedWeek}`;
+    // The list view only ships the fields displayNews renders
+    const url = selectedWeek === 'all' ? '/api/news?view=list' : `/api/news?view=list&week=${selectedWeek}`;
 
     fetch(url)
     .then(res => res.json())
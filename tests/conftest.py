@@ -0,0 +1,25 @@
+"""
+Shared test setup: every data path points into a temporary directory and the
+LLM and embeddings run offline, so tests never touch data/ or the network.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "agents"))
+
+_tmp = tempfile.mkdtemp(prefix="ai-news-tests-")
+os.environ.update({
+    "NEWS_DATA_DIR": os.path.join(_tmp, "data"),
+    "NUMPY_INDEX_DIR": os.path.join(_tmp, "numpy_index"),
+    "LEXICAL_INDEX_PATH": os.path.join(_tmp, "bm25_index.json"),
+    "INDEX_CHECKPOINT_PATH": os.path.join(_tmp, "index_checkpoint.json"),
+    "LLM_BUCKET_PATH": os.path.join(_tmp, "llm_bucket.sqlite3"),
+    "LLM_PROVIDER": "fake",
+    "LLM_FAKE_LATENCY": "0",
+    "EMBEDDING_BACKEND": "fake",
+    "VECTOR_BACKEND": "numpy",
+    "NOTION_TOKEN": "",
+})
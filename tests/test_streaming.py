@@ -0,0 +1,49 @@
+import feedparser
+import pytest
+
+from doc_loader import streaming
+
+FEED = """<?xml version="1.0"?><rss version="2.0"><channel><title>t</title>
+<item><title>Streamed article</title><link>https://example.com/streamed</link><guid>streamed-1</guid>
+<pubDate>Mon, 13 Oct 2025 10:00:00 GMT</pubDate><description>Body about neural nets</description></item>
+</channel></rss>"""
+
+@pytest.fixture
+def feed(monkeypatch, tmp_path):
+    """A feed that answers 304 to a request carrying its ETag; records the ETag of every request."""
+    path = tmp_path / "feed.xml"
+    path.write_text(FEED, encoding="utf-8")
+    requests = []
+    real_parse = feedparser.parse
+
+    def parse(url, etag=None, modified=None):
+        requests.append(etag)
+        if etag == "v1":
+            return feedparser.FeedParserDict(status=304, entries=[])
+        parsed = real_parse(str(path))
+        parsed["etag"] = "v1"
+        return parsed
+
+    monkeypatch.setattr(streaming.feedparser, "parse", parse)
+    monkeypatch.setattr(streaming, "_feed_validators", {})
+    monkeypatch.setattr(streaming, "summarize_news", lambda *args, **kwargs: {"summary": "A summary."})
+    return requests
+
+def test_failed_stage_refetches_feed_on_next_tick(feed, monkeypatch):
+    write_articles = streaming.write_articles
+
+    def fail(articles):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(streaming, "write_articles", fail)
+    with pytest.raises(RuntimeError):
+        streaming.run_streaming()
+
+    # The failed tick must not leave its ETag behind, or the next one gets a 304
+    monkeypatch.setattr(streaming, "write_articles", write_articles)
+    assert streaming.run_streaming() == 1
+    assert feed == [None, None]
+
+    # Once everything is streamed the validators are kept
+    assert streaming.run_streaming() == 0
+    assert feed == [None, None, "v1"]
@@ -0,0 +1,55 @@
+import pytest
+from langchain.schema import Document
+
+try:
+    import chromadb
+except Exception as e:  # e.g. chromadb 0.5 does not import under NumPy 2
+    pytest.skip(f"chromadb unavailable: {e}", allow_module_level=True)
+
+from rag.embedding import ChromaBackend, NumpyBackend, embeddings
+
+TEXTS = [
+    "neural networks learn representations from data",
+    "a new vaccine design predicted by machine learning",
+    "robots learn to grasp objects with reinforcement learning",
+    "language models write code and answer questions",
+    "climate models run faster on GPUs",
+]
+
+def _documents():
+    return [Document(page_content=text, metadata={"link": f"https://example.com/{i}", "week": "2025-W42"})
+            for i, text in enumerate(TEXTS)]
+
+def _distances(backend, query):
+    """{link: distance} for every document; a dict because documents at equal distance may come back in any order."""
+    results = backend.similarity_search_by_vector_with_score(embeddings.embed_query(query), k=len(TEXTS))
+    return {doc.metadata["link"]: pytest.approx(distance, abs=1e-4) for doc, distance in results}
+
+def test_chroma_and_numpy_return_the_same_cosine_distances(tmp_path):
+    numpy_backend = NumpyBackend(str(tmp_path / "numpy"), "none", 10)
+    chroma_backend = ChromaBackend(str(tmp_path / "chroma"), "parity")
+    for backend in (numpy_backend, chroma_backend):
+        backend.add_documents(_documents(), ids=[f"doc-{i}" for i in range(len(TEXTS))])
+    assert chroma_backend.cosine
+
+    for query in ("machine learning for vaccines", "robots grasping"):
+        assert _distances(chroma_backend, query) == _distances(numpy_backend, query)
+
+def test_l2_collection_reports_cosine_distances_and_migrates_on_write(tmp_path):
+    directory = str(tmp_path / "chroma")
+    documents = _documents()
+    legacy = chromadb.PersistentClient(directory).get_or_create_collection("legacy")
+    legacy.add(ids=[f"doc-{i}" for i in range(len(TEXTS))],
+               embeddings=embeddings.embed_documents([doc.page_content for doc in documents]),
+               metadatas=[doc.metadata for doc in documents], documents=[doc.page_content for doc in documents])
+
+    numpy_backend = NumpyBackend(str(tmp_path / "numpy"), "none", 10)
+    numpy_backend.add_documents(documents)
+    chroma_backend = ChromaBackend(directory, "legacy")
+    assert not chroma_backend.cosine
+    query = "language models"
+    assert _distances(chroma_backend, query) == _distances(numpy_backend, query)
+
+    assert chroma_backend.migrate_to_cosine() == len(TEXTS)
+    assert chroma_backend.cosine and chroma_backend.count() == len(TEXTS)
+    assert _distances(chroma_backend, query) == _distances(numpy_backend, query)
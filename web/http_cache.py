@@ -0,0 +1,86 @@
+"""
+HTTP conditional caching and compression for JSON endpoints.
+
+A JsonPayload is serialized (and compressed) once per data change; every
+response built from it carries a strong ETag, Last-Modified and
+Cache-Control, and repeats are answered with 304 Not Modified.
+"""
+import os
+import gzip
+import json
+import hashlib
+import threading
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # optional: fall back to gzip only
+    brotli = None
+
+# Bodies smaller than this aren't worth compressing
+MIN_COMPRESS_SIZE = int(os.environ.get("MIN_COMPRESS_SIZE", "1024"))
+
+def content_hash(raw):
+    """Hash used as the ETag of a representation built from `raw` bytes."""
+    return hashlib.sha256(raw).hexdigest()[:32]
+
+def stat_signature(path):
+    """Cheap change detector for a file or directory: (mtime_ns, size), or None if missing."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+class JsonPayload:
+    """A JSON document serialized once, with lazily built compressed variants."""
+
+    def __init__(self, data, etag, last_modified=None):
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        self._lock = threading.Lock()
+        self._bodies = {}
+
+    def body(self, encoding=None):
+        body = self._bodies.get(encoding)
+        if body is not None:
+            return body
+        with self._lock:
+            if None not in self._bodies:
+                self._bodies[None] = json.dumps(
+                    self.data, ensure_ascii=False, separators=(",", ":")
+                ).encode("utf-8")
+            if encoding == "br":
+                self._bodies["br"] = brotli.compress(self._bodies[None], quality=5)
+            elif encoding == "gzip":
+                self._bodies["gzip"] = gzip.compress(self._bodies[None], compresslevel=6)
+            return self._bodies[encoding]
+
+def _choose_encoding(payload):
+    if len(payload.body()) < MIN_COMPRESS_SIZE:
+        return None
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+def cached_json_response(payload, max_age=60, stale_while_revalidate=300):
+    """Build a conditional, compressed response for `payload` (304 when the client is current)."""
+    encoding = _choose_encoding(payload)
+    response = Response(payload.body(encoding), mimetype="application/json")
+
+    # Each encoding is a distinct representation, so it gets its own strong ETag
+    response.set_etag(f"{payload.etag}-{encoding}" if encoding else payload.etag)
+    if payload.last_modified is not None:
+        response.last_modified = payload.last_modified
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    response.headers["Cache-Control"] = (
+        f"public, max-age={max_age}, stale-while-revalidate={stale_while_revalidate}"
+    )
+    return response.make_conditional(request)
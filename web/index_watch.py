@@ -0,0 +1,69 @@
+"""
+Hot reload of the data files and search indexes in a running web worker.
+
+The ingest pipeline bumps a generation counter (data/.index_generation, see
+agents/doc_loader/catalog.py) whenever new articles land. GenerationWatcher
+stats that file at most once per RELOAD_CHECK_INTERVAL seconds from the
+request path; when the generation moves, the reload callback runs on a
+background thread. Requests keep using the stores they already hold until
+the callback swaps the new ones in, so nothing waits on a reload.
+"""
+import os
+import time
+import threading
+import traceback
+
+RELOAD_CHECK_INTERVAL = float(os.environ.get("RELOAD_CHECK_INTERVAL", "2"))
+
+class GenerationWatcher:
+    """Call `reload(generation)` in the background whenever the generation file changes."""
+
+    def __init__(self, path, read_generation, reload, interval=RELOAD_CHECK_INTERVAL):
+        self.path = str(path)
+        self.read_generation = read_generation
+        self.reload = reload
+        self.interval = interval
+        self.generation = read_generation()
+        self.reloads = 0
+        self._signature = self._stat()
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            return None
+
+    def check(self):
+        """Cheap enough to call on every request: at most one stat() per interval, no locks held."""
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.interval
+        signature = self._stat()
+        if signature == self._signature:
+            return
+        # One reload at a time; a bump that lands meanwhile is picked up by a later check
+        if not self._lock.acquire(blocking=False):
+            return
+        threading.Thread(target=self._reload, args=(signature,), name="index-reload", daemon=True).start()
+
+    def _reload(self, signature):
+        try:
+            generation = self.read_generation()
+            if generation != self.generation:
+                start = time.perf_counter()
+                self.reload(generation)
+                self.reloads += 1
+                print(f"🔄 Reloaded data and indexes for generation {generation} "
+                      f"in {time.perf_counter() - start:.2f}s (was {self.generation})")
+                self.generation = generation
+            self._signature = signature
+        except Exception:
+            # Left at the old signature, so the next check tries again
+            print("❌ Index reload failed:")
+            traceback.print_exc()
+        finally:
+            self._lock.release()
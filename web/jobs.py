@@ -0,0 +1,176 @@
+"""
+Request coalescing and background jobs for expensive endpoints.
+
+SingleFlight collapses identical concurrent calls inside a process into one
+execution. JobQueue runs long work in the background and keeps job state in
+a SQLite file, so identical submissions from any worker process share one
+job and any worker can answer a polling request.
+"""
+import os
+import time
+import uuid
+import json
+import asyncio
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# ----------------------
+# Single-flight
+# ----------------------
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Run at most one call per key at a time; concurrent callers share its result."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key, func, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutines running on one event loop."""
+
+    def __init__(self):
+        self._futures = {}
+        self.executed = 0
+        self.shared = 0
+
+    async def do(self, key, coro_func, *args, **kwargs):
+        future = self._futures.get(key)
+        if future is not None:
+            self.shared += 1
+            # Shield so one cancelled waiter doesn't cancel the work for everyone else
+            return await asyncio.shield(future)
+
+        self.executed += 1
+        future = asyncio.ensure_future(coro_func(*args, **kwargs))
+        self._futures[key] = future
+        future.add_done_callback(lambda _: self._futures.pop(key, None))
+        return await asyncio.shield(future)
+
+# ----------------------
+# Background jobs
+# ----------------------
+JOB_ACTIVE = ("queued", "running")
+
+class JobQueue:
+    """Background job runner with coalescing by key and a SQLite-backed status table."""
+
+    def __init__(self, path, max_workers=2, stale_after=600, retain_for=3600):
+        self.path = path
+        self.stale_after = stale_after
+        self.retain_for = retain_for
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, key TEXT, status TEXT, result TEXT, error TEXT,"
+            " created REAL, updated REAL)"
+        )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def submit(self, key, func, *args, **kwargs):
+        """Start `func` in the background unless an identical job is already active.
+
+        Returns the id of the job (new or existing) to poll.
+        """
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Jobs whose worker died never finish; stop coalescing onto them after stale_after
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE key = ? AND status IN (?, ?) AND updated > ?"
+                " ORDER BY created DESC LIMIT 1",
+                (key, *JOB_ACTIVE, now - self.stale_after),
+            ).fetchone()
+            if row:
+                conn.execute("COMMIT")
+                return row[0]
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, key, status, created, updated) VALUES (?, ?, 'queued', ?, ?)",
+                (job_id, key, now, now),
+            )
+            conn.execute("DELETE FROM jobs WHERE updated < ? AND status NOT IN (?, ?)",
+                         (now - self.retain_for, *JOB_ACTIVE))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        self._executor.submit(self._run, job_id, func, args, kwargs)
+        return job_id
+
+    def _run(self, job_id, func, args, kwargs):
+        self._update(job_id, "running")
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self._update(job_id, "failed", error=str(e))
+        else:
+            self._update(job_id, "done", result=json.dumps(result))
+
+    def _update(self, job_id, status, result=None, error=None):
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, updated = ? WHERE id = ?",
+            (status, result, error, time.time(), job_id),
+        )
+
+    def get(self, job_id):
+        """Return the job's status dict, or None if it is unknown."""
+        row = self._connect().execute(
+            "SELECT id, status, result, error, created, updated FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        job_id, status, result, error, created, updated = row
+        job = {"job_id": job_id, "status": status, "created": created, "updated": updated}
+        if result is not None:
+            job["result"] = json.loads(result)
+        if error is not None:
+            job["error"] = error
+        return job
@@ -0,0 +1,211 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+A small registry of counters, histograms and scrape-time gauges, served at
+/metrics. Route latency is recorded by the Flask hooks in app.py and by
+track_route() for the async routes in asgi.py; stage_timer() times the
+pieces of a request (JSON load, markdown render, embed, vector query, LLM).
+
+Values are per process: with several gunicorn/uvicorn workers each one
+reports its own, tagged with a `pid` label so the series can be summed.
+"""
+import os
+import time
+import bisect
+import functools
+import threading
+from contextlib import contextmanager
+
+# Seconds; wide enough for microsecond cache hits and multi-second LLM calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield self.name, tuple(zip(self.labelnames, key)), value
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self):
+        with self._lock:
+            snapshot = {key: list(series) for key, series in self._series.items()}
+        for key, series in sorted(snapshot.items()):
+            labels = tuple(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                yield f"{self.name}_bucket", labels + (("le", _format_value(float(bound))),), cumulative
+            yield f"{self.name}_sum", labels, series[-1]
+            yield f"{self.name}_count", labels, cumulative
+
+class Gauge:
+    """Value read from a callback at scrape time; the callback returns a number or {label tuple: number}.
+
+    kind="counter" exposes a running total kept elsewhere (e.g. the LLM gateway's token counts).
+    """
+
+    def __init__(self, name, help_text, callback, labelnames=(), kind="gauge"):
+        self.name = name
+        self.help = help_text
+        self.callback = callback
+        self.labelnames = tuple(labelnames)
+        self.kind = kind
+
+    def samples(self):
+        try:
+            value = self.callback()
+        except Exception:
+            return  # e.g. the vector store is unavailable; omit the series rather than fail the scrape
+        if isinstance(value, dict):
+            for key, item in sorted(value.items()):
+                yield self.name, tuple(zip(self.labelnames, key)), item
+        elif value is not None:
+            yield self.name, (), value
+
+class Registry:
+    """Named metrics, rendered together at /metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def register(self, metric):
+        with self._lock:
+            # app.py can be imported twice (run as __main__, then imported by a tool); keep the first
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help_text, labelnames=()):
+        return self.register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def gauge(self, name, help_text, callback, labelnames=(), kind="gauge"):
+        return self.register(Gauge(name, help_text, callback, labelnames, kind))
+
+    def render(self):
+        """The whole registry in Prometheus text format (version 0.0.4)."""
+        pid = (("pid", os.getpid()),)
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(pid + labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# ----------------------
+# Standard metrics
+# ----------------------
+request_latency = registry.histogram(
+    "http_request_duration_seconds", "Request latency by route.", ("method", "route", "status"))
+stage_latency = registry.histogram(
+    "app_stage_duration_seconds", "Time spent in each stage of request handling.", ("stage",))
+cache_requests = registry.counter(
+    "app_cache_requests_total", "In-process cache lookups by cache and result (hit or miss).", ("cache", "result"))
+
+@contextmanager
+def stage_timer(stage):
+    """Time a block as one stage: `with stage_timer("embed"): ...`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_latency.observe(time.perf_counter() - start, stage=stage)
+
+def cache_lookup(cache, hit):
+    """Count one lookup in a named cache; returns `hit` so it can wrap a condition."""
+    cache_requests.inc(cache=cache, result="hit" if hit else "miss")
+    return hit
+
+def track_route(route, method="GET"):
+    """Record request latency for an async (Starlette) endpoint."""
+    def decorator(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(request):
+            start = time.perf_counter()
+            status = 500
+            try:
+                response = await endpoint(request)
+                status = response.status_code
+                return response
+            finally:
+                request_latency.observe(time.perf_counter() - start, method=method, route=route, status=status)
+        return wrapper
+    return decorator
+
+def scheduler_gauges(snapshot):
+    """Export an LLM PriorityScheduler's queue depth, in-flight calls and waits; `snapshot` returns its snapshot()."""
+    def per_class(field):
+        return lambda: {(klass,): stats[field] for klass, stats in snapshot()["classes"].items()}
+
+    registry.gauge("llm_scheduler_queue_depth", "LLM calls waiting for a slot, by priority class.",
+                   per_class("waiting"), labelnames=("class",))
+    registry.gauge("llm_scheduler_in_flight", "LLM calls holding a slot, by priority class.",
+                   per_class("in_flight"), labelnames=("class",))
+    registry.gauge("llm_scheduler_max_queue_depth", "Deepest the LLM scheduler queue has been.",
+                   lambda: snapshot()["max_queue_depth"])
+    registry.gauge("llm_scheduler_granted_total", "LLM slots granted, by priority class.",
+                   per_class("granted"), labelnames=("class",), kind="counter")
+    registry.gauge("llm_scheduler_wait_seconds_avg", "Mean wait for an LLM slot, by priority class.",
+                   per_class("wait_avg"), labelnames=("class",))
+    registry.gauge("llm_scheduler_wait_seconds_max", "Longest wait for an LLM slot, by priority class.",
+                   per_class("wait_max"), labelnames=("class",))
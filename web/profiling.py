@@ -0,0 +1,157 @@
+"""
+Opt-in per-request profiling for investigating slow requests in production.
+
+A request is profiled when profiling is enabled and either it carries the
+`X-Profile: <PROFILE_TOKEN>` header or it is picked by PROFILE_SAMPLE_RATE.
+The request runs under cProfile and the result is written to PROFILE_DIR as
+a .prof file (open with `python -m pstats`, snakeviz, etc.) plus a .json
+sidecar with the route, status, timing and the top functions by cumulative
+time. Only the newest PROFILE_KEEP profiles are kept.
+
+Profiles expose routes, timings and source paths, so reading them back
+(/api/profiles) always needs PROFILE_TOKEN, even when only sampling is on.
+
+Flask routes are profiled by the request hooks in app.py; the async routes
+in asgi.py are wrapped with profile_route(). cProfile follows one thread, so
+an async profile covers the event loop while the request was running (other
+requests served meanwhile included) and work handed to a thread pool shows
+up only as the await.
+
+With both triggers unset, ENABLED is False and the request hooks return
+after one attribute check.
+"""
+import os
+import io
+import hmac
+import json
+import time
+import pstats
+import random
+import cProfile
+import functools
+import threading
+from datetime import datetime, timezone
+
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "./profiles")
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", "200"))
+PROFILE_HEADER = "X-Profile"
+
+ENABLED = bool(PROFILE_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+_prune_lock = threading.Lock()
+# The event loop is one thread, and it can only have one profiler; set while an async request is profiled
+_async_active = False
+
+def has_token(headers):
+    """True if a token is configured and the request's X-Profile header matches it."""
+    return bool(PROFILE_TOKEN) and hmac.compare_digest(headers.get(PROFILE_HEADER, ""), PROFILE_TOKEN)
+
+def should_profile(headers):
+    """True if this request should be profiled (header with the right token, or sampled)."""
+    if has_token(headers):
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+def start():
+    """Start profiling the current thread; returns (profiler, start time), or None if a profiler is already active."""
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        return None
+    return profiler, time.perf_counter()
+
+def finish(session, method, route, path, status, trigger):
+    """Stop a session from start() and write it to PROFILE_DIR; returns the profile id."""
+    profiler, started = session
+    profiler.disable()
+    duration = time.perf_counter() - started
+
+    now = datetime.now(timezone.utc)
+    profile_id = f"{now.strftime('%Y%m%dT%H%M%S%f')}-{os.getpid()}-{threading.get_ident() % 100000}"
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    profiler.dump_stats(os.path.join(PROFILE_DIR, f"{profile_id}.prof"))
+
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(25)
+    meta = {
+        "id": profile_id,
+        "time": now.isoformat(),
+        "method": method,
+        "route": route,
+        "path": path,
+        "status": status,
+        "duration_ms": round(duration * 1000, 2),
+        "trigger": trigger,
+        "pid": os.getpid(),
+        "top": summary.getvalue(),
+    }
+    with open(os.path.join(PROFILE_DIR, f"{profile_id}.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    _prune()
+    return profile_id
+
+def profile_route(route):
+    """Profile sampled or token-carrying requests to an async (Starlette) endpoint, one at a time per process."""
+    def decorator(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(request):
+            global _async_active
+            if not ENABLED or _async_active or not should_profile(request.headers):
+                return await endpoint(request)
+            session = start()
+            if session is None:
+                return await endpoint(request)
+            _async_active = True
+            response = None
+            try:
+                response = await endpoint(request)
+            finally:
+                _async_active = False
+                trigger = "header" if request.headers.get(PROFILE_HEADER) else "sample"
+                status = response.status_code if response is not None else 500
+                profile_id = finish(session, request.method, route, request.url.path, status, trigger)
+            response.headers["X-Profile-Id"] = profile_id
+            return response
+        return wrapper
+    return decorator
+
+def _prune():
+    with _prune_lock:
+        try:
+            names = sorted(name for name in os.listdir(PROFILE_DIR) if name.endswith(".json"))
+        except FileNotFoundError:
+            return
+        for name in names[:-PROFILE_KEEP] if PROFILE_KEEP > 0 else []:
+            for suffix in (".json", ".prof"):
+                try:
+                    os.unlink(os.path.join(PROFILE_DIR, name[:-len(".json")] + suffix))
+                except FileNotFoundError:
+                    pass  # Another worker pruned it first
+
+def list_profiles(limit=50):
+    """Metadata of the newest profiles, newest first (without the function table)."""
+    try:
+        names = sorted((name for name in os.listdir(PROFILE_DIR) if name.endswith(".json")), reverse=True)
+    except FileNotFoundError:
+        return []
+    profiles = []
+    for name in names[:limit]:
+        meta = load_profile(name[:-len(".json")])
+        if meta is not None:
+            meta.pop("top", None)
+            profiles.append(meta)
+    return profiles
+
+def load_profile(profile_id):
+    """Metadata and top-functions table of one profile, or None if it doesn't exist."""
+    # Ids are generated here; refuse anything that could escape PROFILE_DIR
+    if not profile_id or "/" in profile_id or "\\" in profile_id or profile_id.startswith("."):
+        return None
+    try:
+        with open(os.path.join(PROFILE_DIR, f"{profile_id}.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None